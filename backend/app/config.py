@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -14,14 +15,36 @@ class Settings(BaseSettings):
 
     # Embedding
     embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    embedding_onnx_dir: str = "embeddings/onnx"  # used instead of PyTorch if present
     faiss_index_file: str = "embeddings/index.faiss"
+    # Row id map of indexes built before ids were stored in the index itself
     faiss_metadata_file: str = "embeddings/metadata.pkl"
+    faiss_embeddings_file: str = "embeddings/embeddings.npy"  # fp16 row vectors
+    faiss_index_type: str = "flat"  # flat | hnsw | ivfpq
+    # faiss.index_factory string, overrides faiss_index_type when set,
+    # e.g. "OPQ32_64,IVF4096,PQ32" for large corpora or "HNSW32,Flat"
+    faiss_factory: str = ""
+    faiss_quantization: str = "fp16"  # fp32 | fp16 | int8 vector codes (flat index)
+    faiss_use_gpu: bool = False  # needs a faiss-gpu build and a CUDA device
+    embedding_device: str = ""  # cuda | mps | cpu; empty = pick automatically
+    embedding_fp16: bool = True  # half precision when encoding on cuda/mps
+    embedding_batch_size: int = 256  # texts per forward pass when building the index
+    # CPU processes encoding the index build (1 = in-process; 0 = one per core)
+    embedding_processes: int = 1
 
     # LLM
     anthropic_api_key: str = ""
     llm_model: str = "claude-sonnet-4-20250514"
     llm_temperature: float = 0.0
     llm_top_p: float = 0.2
+    llm_cache_enabled: bool = True
+    llm_cache_filename: str = "llm_cache.db"
+    llm_cache_ttl_hours: float = 0  # 0 = cached responses never expire
+    llm_concurrency: int = 8  # rows processed concurrently per job
+    # Send a job's candidate selections as one Message Batch (50% cheaper, slower)
+    llm_batch_api: bool = False
+    # Min. cosine similarity of product contexts to reuse a cached unit conversion
+    unit_conversion_similarity: float = 0.95
 
     # Search
     candidate_top_k: int = 20
@@ -44,6 +67,23 @@ class Settings(BaseSettings):
     def db_path(self) -> Path:
         return Path(self.data_dir) / self.db_filename
 
+    @property
+    def llm_cache_path(self) -> Optional[Path]:
+        """Response cache location, or None when caching is disabled."""
+        if not self.llm_cache_enabled:
+            return None
+        return Path(self.data_dir) / self.llm_cache_filename
+
+    @property
+    def llm_cache_ttl_seconds(self) -> Optional[float]:
+        if self.llm_cache_ttl_hours <= 0:
+            return None
+        return self.llm_cache_ttl_hours * 3600
+
+    @property
+    def embedding_onnx_path(self) -> Path:
+        return Path(self.data_dir) / self.embedding_onnx_dir
+
     @property
     def faiss_index_path(self) -> Path:
         return Path(self.data_dir) / self.faiss_index_file
@@ -52,5 +92,9 @@ class Settings(BaseSettings):
     def faiss_metadata_path(self) -> Path:
         return Path(self.data_dir) / self.faiss_metadata_file
 
+    @property
+    def faiss_embeddings_path(self) -> Path:
+        return Path(self.data_dir) / self.faiss_embeddings_file
+
 
 settings = Settings()
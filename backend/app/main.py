@@ -46,7 +46,13 @@ def startup():
     app.state.store = store
 
     # Load FAISS embedding index
-    emb_index = EmbeddingIndex(model_name=settings.embedding_model)
+    emb_index = EmbeddingIndex(
+        model_name=settings.embedding_model,
+        onnx_path=settings.embedding_onnx_path,
+        use_gpu=settings.faiss_use_gpu,
+        device=settings.embedding_device,
+        fp16=settings.embedding_fp16,
+    )
     try:
         emb_index.load(settings.faiss_index_path, settings.faiss_metadata_path)
     except FileNotFoundError:
@@ -61,18 +67,20 @@ def startup():
         store=store,
         embedding_index=emb_index,
         rrf_k=settings.rrf_k,
+        concurrency=settings.llm_concurrency,
     )
-    retriever.initialize()
     app.state.retriever = retriever
 
     logger.info("Startup complete.")
 
 
 @app.on_event("shutdown")
-def shutdown():
+async def shutdown():
     logger.info("Shutting down...")
     if hasattr(app.state, "store"):
         app.state.store.close()
+    if getattr(app.state, "_llm", None) is not None:
+        await app.state._llm.aclose()
 
 
 # ---------------------------------------------------------------------------
@@ -98,15 +106,15 @@ def health():
         "status": "ok",
         "db_rows": db_rows,
         "index_loaded": emb.is_loaded,
-        "units": sorted(store.get_all_units()),
+        "units": store.get_sorted_units(),
     }
 
 
 @app.get("/api/v1/units")
 def list_units():
-    return {"units": sorted(app.state.store.get_all_units())}
+    return {"units": app.state.store.get_sorted_units()}
 
 
 @app.get("/api/v1/geographies")
 def list_geographies():
-    return {"geographies": sorted(app.state.store.get_all_geographies())}
+    return {"geographies": app.state.store.get_sorted_geographies()}
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
 
 
 # ---------------------------------------------------------------------------
@@ -78,6 +80,7 @@ class DatasetRow(BaseModel):
     id: int
     uuid: str
     activity_name: str
+    activity_name_lower: str  # lowercased + stripped at CSV ingest
     geography: str
     product_name: str
     unit: str
@@ -98,6 +101,23 @@ class CandidateResult(BaseModel):
     fused_score: float = 0.0
     region_priority: int = 3  # 0=exact, 1=GLO, 2=RoW, 3=other
 
+    @cached_property
+    def prompt_payload(self) -> dict[str, str]:
+        """Fields shown to the LLM (emission values excluded to save tokens)."""
+        return {
+            "UUID": self.dataset.uuid,
+            "Activity Name": self.dataset.activity_name,
+            "Geography": self.dataset.geography,
+            "Product": self.dataset.product_name,
+            "Unit": self.dataset.unit,
+        }
+
+    @cached_property
+    def prompt_json(self) -> str:
+        """prompt_payload as an indented JSON object, ready to be joined
+        into the prompt's candidate list."""
+        return orjson.dumps(self.prompt_payload, option=orjson.OPT_INDENT_2).decode()
+
 
 class RetrievalResult(BaseModel):
     force_decompose: bool = False
@@ -275,6 +295,9 @@ class ProvenanceRecord(BaseModel):
 # ---------------------------------------------------------------------------
 
 class ValidationResult(BaseModel):
+    # Frozen so the validator can hand out one shared success instance
+    model_config = ConfigDict(frozen=True)
+
     valid: bool
     error: Optional[str] = None
     data: Optional[Any] = None
@@ -1,6 +1,7 @@
 """Processing endpoints: start batch processing, check progress."""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone
@@ -10,9 +11,13 @@ from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 
 from app.config import settings
 from app.models import (
+    CandidateResult,
     DecisionType,
+    DecompComponent,
+    LLMDecision,
     OutputTooLongError,
     ProcessRequest,
+    RetrievalResult,
     RowStatus,
 )
 from app.services.calculator import Calculator, format_number
@@ -41,11 +46,15 @@ def _get_llm(request: Request) -> LLMOrchestrator:
             model=settings.llm_model,
             temperature=settings.llm_temperature,
             top_p=settings.llm_top_p,
+            cache_path=settings.llm_cache_path,
+            cache_ttl_seconds=settings.llm_cache_ttl_seconds,
+            embedding_index=request.app.state.embedding_index,
+            unit_similarity_threshold=settings.unit_conversion_similarity,
         )
     return request.app.state._llm
 
 
-def process_row(
+async def aprocess_row(
     row: dict,
     store: DatasetStore,
     retriever: CandidateRetriever,
@@ -54,58 +63,105 @@ def process_row(
     validator: Validator,
     mode: str,
 ):
-    """Process a single input row through the full pipeline."""
-    row_id = row["id"]
+    """Process a single input row through the full pipeline.
 
+    The selection call is awaited on the AsyncAnthropic client, the
+    synchronous phases run in worker threads."""
     try:
-        # Step A: Already normalized during upload/edit
-        store.update_input_row_status(row_id, RowStatus.SEARCHING.value)
-
-        # Step B: Candidate Retrieval
-        retrieval = retriever.retrieve(
-            bezeichnung=row.get("bezeichnung_norm") or row["bezeichnung"],
-            produktinfo=row.get("produktinfo_norm") or row.get("produktinformationen") or "",
-            referenzeinheit=row["referenzeinheit"],
-            region=row.get("region_norm") or row.get("region"),
-            top_k=settings.candidate_top_k,
-            scope=row.get("scope"),
-            kategorie=row.get("kategorie"),
-        )
-
-        # Step C: LLM Decision
-        store.update_input_row_status(row_id, RowStatus.LLM_DECIDING.value)
-
+        retrieval = await asyncio.to_thread(_retrieve_candidates, row, store, retriever)
+        store.update_input_row_status(row["id"], RowStatus.LLM_DECIDING.value)
         if retrieval.force_decompose:
-            # Unit not in DB or no candidates -> force decomposition
-            decision = llm.request_decomposition(
-                input_row=row,
-                reason=retrieval.force_decompose_reason or "No candidates found",
+            decision = await asyncio.to_thread(_decide, row, retrieval, llm)
+        else:
+            decision = await llm.adecide(input_row=row, candidates=retrieval.candidates)
+
+        if decision.type == DecisionType.DECOMPOSE:
+            store.update_input_row_status(row["id"], RowStatus.DECOMPOSING.value)
+            try:
+                resolved = await _aresolve_components(
+                    row, decision, retriever, llm, validator
+                )
+            except _ComponentError as e:
+                store.update_input_row_status(row["id"], RowStatus.ERROR.value, str(e))
+                return
+            await asyncio.to_thread(
+                _handle_decompose,
+                row, decision, store, retriever, llm, calculator, validator, resolved,
             )
         else:
-            decision = llm.decide(
-                input_row=row,
-                candidates=retrieval.candidates,
+            await asyncio.to_thread(
+                _apply_decision,
+                row, decision, store, retriever, llm, calculator, validator, mode,
             )
+    except Exception as e:
+        _fail_row(row["id"], store, e)
 
-        # Handle the three decision types
-        if decision.type == DecisionType.MATCH:
-            _handle_match(row, decision, store, calculator, validator, llm)
 
-        elif decision.type == DecisionType.AMBIGUOUS:
-            _handle_ambiguous(row, decision, store, mode, llm, calculator, validator)
+def _retrieve_candidates(
+    row: dict,
+    store: DatasetStore,
+    retriever: CandidateRetriever,
+) -> RetrievalResult:
+    """Pipeline phase 1: candidate retrieval."""
+    # Step A: Already normalized during upload/edit
+    store.update_input_row_status(row["id"], RowStatus.SEARCHING.value)
+
+    # Step B: Candidate Retrieval
+    return retriever.retrieve(
+        bezeichnung=row.get("bezeichnung_norm") or row["bezeichnung"],
+        produktinfo=row.get("produktinfo_norm") or row.get("produktinformationen") or "",
+        referenzeinheit=row["referenzeinheit"],
+        region=row.get("region_norm") or row.get("region"),
+        top_k=settings.candidate_top_k,
+        scope=row.get("scope"),
+        kategorie=row.get("kategorie"),
+    )
 
-        elif decision.type == DecisionType.DECOMPOSE:
-            _handle_decompose(
-                row, decision, store, retriever, llm, calculator, validator
-            )
 
-    except OutputTooLongError as e:
-        store.update_input_row_status(row_id, RowStatus.ERROR.value, str(e))
-        logger.error(f"Row {row_id}: Output too long: {e}")
+def _decide(row: dict, retrieval: RetrievalResult, llm: LLMOrchestrator) -> LLMDecision:
+    """Pipeline phase 2 (Step C): LLM decision for a single row."""
+    if retrieval.force_decompose:
+        # Unit not in DB or no candidates -> force decomposition
+        return llm.request_decomposition(
+            input_row=row,
+            reason=retrieval.force_decompose_reason or "No candidates found",
+        )
+    return llm.decide(
+        input_row=row,
+        candidates=retrieval.candidates,
+    )
+
+
+def _apply_decision(
+    row: dict,
+    decision: LLMDecision,
+    store: DatasetStore,
+    retriever: CandidateRetriever,
+    llm: LLMOrchestrator,
+    calculator: Calculator,
+    validator: Validator,
+    mode: str,
+):
+    """Pipeline phase 3: handle the three decision types."""
+    if decision.type == DecisionType.MATCH:
+        _handle_match(row, decision, store, calculator, validator, llm)
+
+    elif decision.type == DecisionType.AMBIGUOUS:
+        _handle_ambiguous(row, decision, store, mode, llm, calculator, validator)
+
+    elif decision.type == DecisionType.DECOMPOSE:
+        _handle_decompose(
+            row, decision, store, retriever, llm, calculator, validator
+        )
 
-    except Exception as e:
-        store.update_input_row_status(row_id, RowStatus.ERROR.value, str(e))
-        logger.exception(f"Row {row_id}: Processing failed: {e}")
+
+def _fail_row(row_id: int, store: DatasetStore, e: BaseException):
+    """Mark a row as failed and log why."""
+    store.update_input_row_status(row_id, RowStatus.ERROR.value, str(e))
+    if isinstance(e, OutputTooLongError):
+        logger.error(f"Row {row_id}: Output too long: {e}")
+    else:
+        logger.error(f"Row {row_id}: Processing failed: {e}", exc_info=e)
 
 
 def _handle_match(
@@ -220,7 +276,6 @@ def _handle_ambiguous(
     if mode == "auto" and decision.candidates:
         # In auto mode, pick the first (highest-ranked) candidate and process it as match
         top = decision.candidates[0]
-        from app.models import LLMDecision
         match_decision = LLMDecision(
             type=DecisionType.MATCH,
             selected_uuid=top.uuid,
@@ -247,77 +302,31 @@ def _handle_decompose(
     llm: LLMOrchestrator,
     calculator: Calculator,
     validator: Validator,
+    resolved_components: Optional[list[dict]] = None,
 ):
-    """Handle a decomposition decision with sub-searches for each component."""
+    """Handle a decomposition decision with sub-searches for each component.
+
+    resolved_components may be passed in when the components were already
+    matched (see _aresolve_components); otherwise they are resolved here,
+    one after another.
+    """
     row_id = row["id"]
     store.update_input_row_status(row_id, RowStatus.DECOMPOSING.value)
 
-    resolved_components = []
-
-    for comp in decision.components:
-        # Sub-search for each component
-        sub_retrieval = retriever.retrieve(
-            bezeichnung=comp.search_query_text,
-            produktinfo="",
-            referenzeinheit=comp.assumed_unit,
-            region=row.get("region_norm") or "GLO",
-            top_k=20,
-        )
-
-        if sub_retrieval.force_decompose or not sub_retrieval.candidates:
-            store.update_input_row_status(
-                row_id,
-                RowStatus.ERROR.value,
-                f"Component '{comp.component_label}' ({comp.search_query_text}): "
-                f"no candidates found (unit: {comp.assumed_unit})",
-            )
-            return
-
-        # LLM selects among component candidates (no further decomposition allowed)
-        comp_input = {
-            "bezeichnung": comp.search_query_text,
-            "produktinformationen": "",
-            "referenzeinheit": comp.assumed_unit,
-            "region_norm": row.get("region_norm") or "GLO",
-        }
-        comp_decision = llm.decide(comp_input, sub_retrieval.candidates, allow_decompose=False)
-
-        if comp_decision.type == DecisionType.MATCH:
-            # Validate
-            v = validator.validate_uuid(comp_decision.selected_uuid)
-            if not v.valid:
-                store.update_input_row_status(row_id, RowStatus.ERROR.value, v.error)
-                return
-            resolved_components.append({
-                "component_label": comp.component_label,
-                "assumed_quantity": comp.assumed_quantity,
-                "assumed_unit": comp.assumed_unit,
-                "matched_uuid": comp_decision.selected_uuid,
-            })
-        elif comp_decision.type == DecisionType.AMBIGUOUS:
-            # For components, auto-select top candidate
-            if comp_decision.candidates:
-                top = comp_decision.candidates[0]
-                resolved_components.append({
-                    "component_label": comp.component_label,
-                    "assumed_quantity": comp.assumed_quantity,
-                    "assumed_unit": comp.assumed_unit,
-                    "matched_uuid": top.uuid,
-                })
-            else:
-                store.update_input_row_status(
-                    row_id,
-                    RowStatus.ERROR.value,
-                    f"Component '{comp.component_label}': ambiguous but no candidates returned",
+    if resolved_components is None:
+        resolved_components = []
+        try:
+            for comp in decision.components:
+                candidates = _component_candidates(comp, row, retriever)
+                # LLM selects among component candidates (no further decomposition allowed)
+                comp_decision = llm.decide(
+                    _component_input(comp, row), candidates, allow_decompose=False
                 )
-                return
-        else:
-            # Decomposition requested for a component - not allowed (max 1 level)
-            store.update_input_row_status(
-                row_id,
-                RowStatus.ERROR.value,
-                f"Component '{comp.component_label}': nested decomposition not supported",
-            )
+                resolved_components.append(
+                    _resolve_component(comp, comp_decision, validator)
+                )
+        except _ComponentError as e:
+            store.update_input_row_status(row_id, RowStatus.ERROR.value, str(e))
             return
 
     # Validate: Sum of component quantities should equal 1 reference unit
@@ -386,6 +395,103 @@ def _handle_decompose(
     store.update_input_row_status(row_id, RowStatus.CALCULATED.value)
 
 
+class _ComponentError(Exception):
+    """A decomposition component could not be matched to a dataset."""
+
+
+def _component_input(comp: DecompComponent, row: dict) -> dict:
+    """Input row for the component's candidate selection."""
+    return {
+        "bezeichnung": comp.search_query_text,
+        "produktinformationen": "",
+        "referenzeinheit": comp.assumed_unit,
+        "region_norm": row.get("region_norm") or "GLO",
+    }
+
+
+def _component_candidates(
+    comp: DecompComponent,
+    row: dict,
+    retriever: CandidateRetriever,
+) -> list[CandidateResult]:
+    """Sub-search for a component; raises _ComponentError without candidates."""
+    sub_retrieval = retriever.retrieve(
+        bezeichnung=comp.search_query_text,
+        produktinfo="",
+        referenzeinheit=comp.assumed_unit,
+        region=row.get("region_norm") or "GLO",
+        top_k=20,
+    )
+    if sub_retrieval.force_decompose or not sub_retrieval.candidates:
+        raise _ComponentError(
+            f"Component '{comp.component_label}' ({comp.search_query_text}): "
+            f"no candidates found (unit: {comp.assumed_unit})"
+        )
+    return sub_retrieval.candidates
+
+
+def _resolve_component(
+    comp: DecompComponent,
+    comp_decision: LLMDecision,
+    validator: Validator,
+) -> dict:
+    """Turn the LLM's choice for a component into a resolved component dict."""
+    if comp_decision.type == DecisionType.MATCH:
+        # Validate
+        v = validator.validate_uuid(comp_decision.selected_uuid)
+        if not v.valid:
+            raise _ComponentError(v.error)
+        matched_uuid = comp_decision.selected_uuid
+    elif comp_decision.type == DecisionType.AMBIGUOUS:
+        # For components, auto-select top candidate
+        if not comp_decision.candidates:
+            raise _ComponentError(
+                f"Component '{comp.component_label}': ambiguous but no candidates returned"
+            )
+        matched_uuid = comp_decision.candidates[0].uuid
+    else:
+        # Decomposition requested for a component - not allowed (max 1 level)
+        raise _ComponentError(
+            f"Component '{comp.component_label}': nested decomposition not supported"
+        )
+    return {
+        "component_label": comp.component_label,
+        "assumed_quantity": comp.assumed_quantity,
+        "assumed_unit": comp.assumed_unit,
+        "matched_uuid": matched_uuid,
+    }
+
+
+async def _aresolve_components(
+    row: dict,
+    decision: LLMDecision,
+    retriever: CandidateRetriever,
+    llm: LLMOrchestrator,
+    validator: Validator,
+) -> list[dict]:
+    """Match all components of a decomposition concurrently.
+
+    Total time is roughly that of the slowest component instead of the sum.
+    """
+    async def _one(comp: DecompComponent) -> dict:
+        candidates = await asyncio.to_thread(_component_candidates, comp, row, retriever)
+        # LLM selects among component candidates (no further decomposition allowed)
+        comp_decision = await llm.adecide(
+            _component_input(comp, row), candidates, allow_decompose=False
+        )
+        return _resolve_component(comp, comp_decision, validator)
+
+    tasks = [asyncio.create_task(_one(comp)) for comp in decision.components]
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        # Once one component fails the row is an error; stop the others'
+        # retrieval and Claude calls and collect their outcomes
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 def _build_provenance(row, decision_type, uuids, quantities, calc_result) -> dict:
     """Build provenance JSON record."""
     return {
@@ -421,6 +527,10 @@ def _process_all_rows(
         model=settings.llm_model,
         temperature=settings.llm_temperature,
         top_p=settings.llm_top_p,
+        cache_path=settings.llm_cache_path,
+        cache_ttl_seconds=settings.llm_cache_ttl_seconds,
+        embedding_index=embedding_index,
+        unit_similarity_threshold=settings.unit_conversion_similarity,
     )
     calculator = Calculator(store)
     validator = Validator(store)
@@ -429,15 +539,21 @@ def _process_all_rows(
     rows = store.get_input_rows(job_id)
     pending = [r for r in rows if r["status"] == "pending"]
 
-    done = 0
-    for i, row in enumerate(pending):
-        process_row(row, store, retriever, llm, calculator, validator, mode)
-        done += 1
-        store.update_job_status(job_id, "processing", done_rows=done)
-        # Rate limit: wait between rows to stay under API token limits
-        if i < len(pending) - 1:
-            import time
-            time.sleep(15)
+    async def _run() -> int:
+        try:
+            if settings.llm_batch_api:
+                return await asyncio.to_thread(
+                    _process_rows_batched,
+                    job_id, pending, mode, store, retriever, llm, calculator, validator,
+                )
+            return await _process_rows_concurrently(
+                job_id, pending, mode, store, retriever, llm, calculator, validator
+            )
+        finally:
+            # On the loop that owns the async client's connections
+            await llm.aclose()
+
+    done = asyncio.run(_run())
 
     # Check if all rows are done
     rows = store.get_input_rows(job_id)
@@ -448,6 +564,90 @@ def _process_all_rows(
         store.update_job_status(job_id, "completed", done_rows=done)
 
 
+async def _process_rows_concurrently(
+    job_id: str,
+    pending: list[dict],
+    mode: str,
+    store: DatasetStore,
+    retriever: CandidateRetriever,
+    llm: LLMOrchestrator,
+    calculator: Calculator,
+    validator: Validator,
+) -> int:
+    """Process rows with up to settings.llm_concurrency in flight.
+
+    Rate limits are handled by the orchestrator's backoff rather than a
+    fixed pause between rows. Returns the number of rows handled.
+    """
+    semaphore = asyncio.Semaphore(settings.llm_concurrency)
+    done = 0
+
+    async def _run(row: dict):
+        nonlocal done
+        async with semaphore:
+            await aprocess_row(row, store, retriever, llm, calculator, validator, mode)
+        done += 1
+        store.update_job_status(job_id, "processing", done_rows=done)
+
+    await asyncio.gather(*(_run(row) for row in pending))
+    return done
+
+
+def _process_rows_batched(
+    job_id: str,
+    pending: list[dict],
+    mode: str,
+    store: DatasetStore,
+    retriever: CandidateRetriever,
+    llm: LLMOrchestrator,
+    calculator: Calculator,
+    validator: Validator,
+) -> int:
+    """Run the pipeline phase by phase, selecting candidates for all rows in
+    one Message Batches request. Returns the number of rows handled."""
+    # Phase 1: retrieval for every row
+    retrievals: dict[int, RetrievalResult] = {}
+    for row in pending:
+        try:
+            retrievals[row["id"]] = _retrieve_candidates(row, store, retriever)
+        except Exception as e:
+            _fail_row(row["id"], store, e)
+
+    # Phase 2: one batch for all candidate selections; forced decompositions
+    # use a different prompt and stay on the direct path below
+    selectable = [
+        row for row in pending
+        if row["id"] in retrievals and not retrievals[row["id"]].force_decompose
+    ]
+    for row in selectable:
+        store.update_input_row_status(row["id"], RowStatus.LLM_DECIDING.value)
+    batch_decisions = llm.decide_batch(
+        [(row, retrievals[row["id"]].candidates) for row in selectable]
+    )
+    decisions = {row["id"]: d for row, d in zip(selectable, batch_decisions)}
+
+    # Phase 3: apply decisions
+    done = 0
+    for row in pending:
+        row_id = row["id"]
+        if row_id in retrievals:
+            try:
+                decision = decisions.get(row_id)
+                if decision is None:
+                    store.update_input_row_status(row_id, RowStatus.LLM_DECIDING.value)
+                    decision = _decide(row, retrievals[row_id], llm)
+                elif isinstance(decision, BaseException):
+                    raise decision
+                _apply_decision(
+                    row, decision, store, retriever, llm, calculator, validator, mode
+                )
+            except Exception as e:
+                _fail_row(row_id, store, e)
+        done += 1
+        store.update_job_status(job_id, "processing", done_rows=done)
+    return done
+
+
 @router.post("/jobs/{job_id}/process")
 async def start_processing(
     job_id: str,
@@ -36,6 +36,10 @@ def _get_llm(request: Request) -> LLMOrchestrator:
             model=settings.llm_model,
             temperature=settings.llm_temperature,
             top_p=settings.llm_top_p,
+            cache_path=settings.llm_cache_path,
+            cache_ttl_seconds=settings.llm_cache_ttl_seconds,
+            embedding_index=request.app.state.embedding_index,
+            unit_similarity_threshold=settings.unit_conversion_similarity,
         )
     return request.app.state._llm
 
@@ -1,14 +1,14 @@
-"""Hybrid BM25 + embedding candidate retrieval with region/unit filtering."""
+"""Hybrid BM25 (SQLite FTS5) + embedding candidate retrieval with region/unit filtering."""
 from __future__ import annotations
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from rank_bm25 import BM25Okapi
 from unidecode import unidecode
 
-from app.models import CandidateResult, DatasetRow, RetrievalResult
+from app.models import CandidateResult, RetrievalResult
 from app.services.dataset_store import DatasetStore
 from app.services.embedding_builder import EmbeddingIndex
 
@@ -586,42 +586,30 @@ def normalize_query(text: str) -> str:
     return text
 
 
-def tokenize(text: str) -> list[str]:
-    """Simple whitespace + punctuation tokenizer for BM25."""
-    text = re.sub(r"[^\w\s]", " ", text.lower())
-    return text.split()
-
-
 # ---------------------------------------------------------------------------
 # CandidateRetriever
 # ---------------------------------------------------------------------------
 
 class CandidateRetriever:
-    """Hybrid BM25 + embedding search with region/unit filtering."""
+    """Hybrid BM25 (FTS5) + embedding search with region/unit filtering."""
 
     def __init__(
         self,
         store: DatasetStore,
         embedding_index: EmbeddingIndex,
         rrf_k: int = 60,
+        concurrency: int = 1,
     ):
         self.store = store
         self.embedding_index = embedding_index
         self.rrf_k = rrf_k
 
-        # Build BM25 index from non-market rows
-        self._bm25: Optional[BM25Okapi] = None
-        self._bm25_ids: list[int] = []
-        self._bm25_rows: dict[int, DatasetRow] = {}
-
-    def initialize(self):
-        """Build BM25 index. Call once after DatasetStore is initialized."""
-        logger.info("Building BM25 index...")
-        texts_with_ids = self.store.get_non_market_search_texts()
-        self._bm25_ids = [t[0] for t in texts_with_ids]
-        tokenized = [tokenize(t[1]) for t in texts_with_ids]
-        self._bm25 = BM25Okapi(tokenized)
-        logger.info(f"BM25 index built with {len(self._bm25_ids)} documents")
+        # BM25 and embedding searches are independent; run them side by side.
+        # Two workers per row retrieved concurrently, so rows don't queue
+        # behind each other's searches
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=2 * concurrency, thread_name_prefix="retriever"
+        )
 
     def retrieve(
         self,
@@ -680,11 +668,11 @@ class CandidateRetriever:
                 force_decompose_reason="Empty query after normalization",
             )
 
-        # Step 3: BM25 search
-        bm25_results = self._bm25_search(query, top_n=100)
-
-        # Step 4: Embedding search
-        embed_results = self._embedding_search(query, top_n=100)
+        # Step 3 + 4: BM25 and embedding search, run concurrently
+        bm25_fut = self._search_pool.submit(self._bm25_search, query, 100)
+        embed_fut = self._search_pool.submit(self._embedding_search, query, 100)
+        bm25_results = bm25_fut.result()
+        embed_results = embed_fut.result()
 
         # Step 5: Reciprocal Rank Fusion
         fused = self._rrf_merge(bm25_results, embed_results)
@@ -732,20 +720,13 @@ class CandidateRetriever:
         )
 
     def _bm25_search(self, query: str, top_n: int = 100) -> list[tuple[int, float]]:
-        """BM25 search returning (dataset_row_id, score) pairs. Higher=better."""
-        if self._bm25 is None:
-            return []
-        tokens = tokenize(query)
-        if not tokens:
-            return []
-        scores = self._bm25.get_scores(tokens)
-        # Get top N indices
-        top_indices = scores.argsort()[-top_n:][::-1]
-        results = []
-        for idx in top_indices:
-            if scores[idx] > 0:
-                results.append((self._bm25_ids[idx], float(scores[idx])))
-        return results
+        """BM25 search returning (dataset_row_id, score) pairs. Higher=better.
+
+        Uses SQLite's native FTS5 bm25() over non-market rows.
+        """
+        results = self.store.fts_search(query, limit=top_n, exclude_market=True)
+        # FTS5 bm25() is negative (lower = better); flip so higher = better
+        return [(row_id, -score) for row_id, score in results]
 
     def _embedding_search(self, query: str, top_n: int = 100) -> list[tuple[int, float]]:
         """Embedding search returning (dataset_row_id, score) pairs. Higher=better."""
@@ -763,23 +744,27 @@ class CandidateRetriever:
         Returns list of (row_id, rrf_score, bm25_rank, embed_rank).
         """
         k = self.rrf_k
-        scores: dict[int, float] = {}
-        bm25_ranks: dict[int, int] = {}
-        embed_ranks: dict[int, int] = {}
+        # row_id -> [rrf_score, bm25_rank, embed_rank]
+        entries: dict[int, list] = {}
 
         for rank, (row_id, _) in enumerate(bm25_results):
-            scores[row_id] = scores.get(row_id, 0) + 1.0 / (k + rank + 1)
-            bm25_ranks[row_id] = rank + 1
+            entry = entries.get(row_id)
+            if entry is None:
+                entries[row_id] = [1.0 / (k + rank + 1), rank + 1, None]
+            else:
+                entry[0] += 1.0 / (k + rank + 1)
+                entry[1] = rank + 1
 
         for rank, (row_id, _) in enumerate(embed_results):
-            scores[row_id] = scores.get(row_id, 0) + 1.0 / (k + rank + 1)
-            embed_ranks[row_id] = rank + 1
-
-        merged = sorted(scores.items(), key=lambda x: -x[1])
-        return [
-            (row_id, score, bm25_ranks.get(row_id), embed_ranks.get(row_id))
-            for row_id, score in merged
-        ]
+            entry = entries.get(row_id)
+            if entry is None:
+                entries[row_id] = [1.0 / (k + rank + 1), None, rank + 1]
+            else:
+                entry[0] += 1.0 / (k + rank + 1)
+                entry[2] = rank + 1
+
+        merged = sorted(entries.items(), key=lambda x: -x[1][0])
+        return [(row_id, v[0], v[1], v[2]) for row_id, v in merged]
 
     def _build_region_priority(self, requested_region: str) -> dict[str, int]:
         """Build region -> priority mapping.
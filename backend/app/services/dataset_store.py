@@ -1,13 +1,17 @@
 """Load ecoinvent CSV into SQLite with FTS5 index for fast text search."""
 from __future__ import annotations
 
+import csv
+import functools
 import logging
+import shutil
 import sqlite3
+import subprocess
 import threading
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Optional
-
-import pandas as pd
+from typing import Iterator, Optional
 
 from app.models import DatasetRow
 
@@ -36,7 +40,10 @@ CREATE TABLE IF NOT EXISTS datasets (
     is_market           INTEGER NOT NULL DEFAULT 0,
     search_text         TEXT NOT NULL
 );
+"""
 
+# Secondary indexes; created after the bulk load so inserts don't maintain them
+_CREATE_INDEXES = """
 CREATE INDEX IF NOT EXISTS idx_datasets_uuid ON datasets(uuid);
 CREATE INDEX IF NOT EXISTS idx_datasets_geography ON datasets(geography);
 CREATE INDEX IF NOT EXISTS idx_datasets_unit ON datasets(unit);
@@ -53,11 +60,41 @@ CREATE VIRTUAL TABLE IF NOT EXISTS datasets_fts USING fts5(
 );
 """
 
-_POPULATE_FTS = """
-INSERT INTO datasets_fts(rowid, search_text)
-SELECT id, search_text FROM datasets;
+# Removes the ecoinvent data (not the job tables) so it can be reloaded
+_DROP_DATASETS = """
+DROP TABLE IF EXISTS datasets_fts;
+DROP TABLE IF EXISTS datasets;
 """
 
+_INSERT_DATASET = """
+INSERT INTO datasets
+    (uuid, activity_name, activity_name_lower, geography,
+     product_name, product_name_lower, unit, amount,
+     biogenic_kg, total_excl_bio_kg, is_market, search_text)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rows per executemany() call during CSV ingestion
+_INSERT_CHUNK_SIZE = 10_000
+
+# Connection settings for the one-off CSV load: no fsync on commit, temp
+# b-trees in memory and a 256 MiB page cache. Restored after the load.
+_BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",
+}
+
+# FTS5 query shaping: keep only the most selective terms, OR'ed, plus a NEAR
+# group of the two most selective ones that boosts rows where they co-occur
+_FTS_MAX_TERMS = 6
+_FTS_NEAR_DISTANCE = 10
+# Distinct query terms whose document counts are kept in memory
+_FTS_TERM_CACHE_SIZE = 4096
+
+# Rebuilds the external-content FTS index from datasets in one pass
+_POPULATE_FTS = "INSERT INTO datasets_fts(datasets_fts) VALUES('rebuild')"
+
 _CREATE_JOB_TABLES = """
 CREATE TABLE IF NOT EXISTS processing_jobs (
     id          TEXT PRIMARY KEY,
@@ -106,6 +143,173 @@ CREATE TABLE IF NOT EXISTS row_results (
 """
 
 
+# ---------------------------------------------------------------------------
+# CSV parsing
+# ---------------------------------------------------------------------------
+
+# datasets column -> ecoinvent CSV header
+_CSV_COLUMNS = {
+    "uuid": "Activity UUID_Product UUID",
+    "activity_name": "Activity Name",
+    "geography": "Geography",
+    "product_name": "Reference Product Name",
+    "unit": "Reference Product Unit",
+    "amount": "Reference Product Amount",
+    "biogenic_kg": "Biogenic [kg CO2-Eq]",
+    "total_excl_bio_kg": "Total (excl. Biogenic) [kg CO2-Eq]",
+}
+
+# Raw CSV table filled by the sqlite3 CLI's .import (columns c0, c1, ...)
+_CSV_STAGING_TABLE = "_csv_staging"
+
+# Derives the datasets columns from the staging table like _iter_csv_records
+# does; {name} placeholders are staging columns per _CSV_COLUMNS.
+# lower_strip and parse_decimal are registered from Python so non-ASCII names
+# lowercase the same and decimals round like float() (SQLite's CAST AS REAL
+# can differ in the last digit, e.g. 0.7029030000000001 for "0.702903").
+_INSERT_FROM_STAGING = """
+INSERT INTO datasets
+    (uuid, activity_name, activity_name_lower, geography,
+     product_name, product_name_lower, unit, amount,
+     biogenic_kg, total_excl_bio_kg, is_market, search_text)
+SELECT uuid, activity_name, activity_lower, geography,
+       product_name, product_lower, unit, amount,
+       biogenic_kg, total_excl_bio_kg,
+       substr(activity_lower, 1, 6) = 'market',
+       activity_lower || ' ' || product_lower
+FROM (
+    SELECT {uuid} AS uuid,
+           {activity_name} AS activity_name,
+           lower_strip({activity_name}) AS activity_lower,
+           {geography} AS geography,
+           {product_name} AS product_name,
+           lower_strip({product_name}) AS product_lower,
+           {unit} AS unit,
+           CAST({amount} AS INTEGER) AS amount,
+           parse_decimal({biogenic_kg}) AS biogenic_kg,
+           parse_decimal({total_excl_bio_kg}) AS total_excl_bio_kg
+    FROM {staging}
+    WHERE {activity_name} IS NOT NULL
+    ORDER BY rowid
+)
+"""
+
+
+def _lower_strip(value: Optional[str]) -> Optional[str]:
+    return value.lower().strip() if value is not None else None
+
+
+def _parse_decimal(value: str) -> float:
+    """Parse a European-format decimal (comma as separator)."""
+    return float(value.replace(",", "."))
+
+
+def _iter_csv_records(reader: Iterator[list[str]], header: list[str]) -> Iterator[tuple]:
+    """Yield insert tuples for the datasets table from ecoinvent CSV rows."""
+    col = {name: idx for idx, name in enumerate(header)}
+    i_uuid = col[_CSV_COLUMNS["uuid"]]
+    i_activity = col[_CSV_COLUMNS["activity_name"]]
+    i_geography = col[_CSV_COLUMNS["geography"]]
+    i_product = col[_CSV_COLUMNS["product_name"]]
+    i_unit = col[_CSV_COLUMNS["unit"]]
+    i_amount = col[_CSV_COLUMNS["amount"]]
+    i_bio = col[_CSV_COLUMNS["biogenic_kg"]]
+    i_total = col[_CSV_COLUMNS["total_excl_bio_kg"]]
+
+    for values in reader:
+        if not values:
+            continue
+        activity_name = values[i_activity]
+        product_name = values[i_product]
+        activity_lower = activity_name.lower().strip()
+        product_lower = product_name.lower().strip()
+        yield (
+            values[i_uuid],
+            activity_name,
+            activity_lower,
+            # Missing Geography stays empty (treated as unspecified)
+            values[i_geography],
+            product_name,
+            product_lower,
+            values[i_unit],
+            int(values[i_amount]),
+            _parse_decimal(values[i_bio]),
+            _parse_decimal(values[i_total]),
+            int(activity_lower.startswith("market")),
+            activity_lower + " " + product_lower,
+        )
+
+
+def _iter_arrow_records(csv_path: Path) -> Iterator[tuple]:
+    """Return the same insert tuples as _iter_csv_records, parsing the CSV
+    with pyarrow and computing the derived columns column-wise.
+
+    Raises ImportError if pyarrow is not installed.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+
+    numeric_types = {
+        _CSV_COLUMNS["amount"]: pa.int64(),
+        _CSV_COLUMNS["biogenic_kg"]: pa.float64(),
+        _CSV_COLUMNS["total_excl_bio_kg"]: pa.float64(),
+    }
+    # Arrow splits the mapped file into blocks on row boundaries and parses
+    # them on its thread pool; quoted fields are handled, unlike a naive
+    # newline split.
+    with pa.memory_map(str(csv_path)) as source:
+        table = pa_csv.read_csv(
+            source,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            parse_options=pa_csv.ParseOptions(delimiter=";"),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(_CSV_COLUMNS.values()),
+                column_types={
+                    name: numeric_types.get(name, pa.string())
+                    for name in _CSV_COLUMNS.values()
+                },
+                decimal_point=",",
+                # Missing Geography stays empty (treated as unspecified)
+                strings_can_be_null=False,
+            ),
+        )
+    column = {field: table[name] for field, name in _CSV_COLUMNS.items()}
+    activity_lower = pc.utf8_trim_whitespace(pc.utf8_lower(column["activity_name"]))
+    product_lower = pc.utf8_trim_whitespace(pc.utf8_lower(column["product_name"]))
+    columns = [
+        column["uuid"],
+        column["activity_name"],
+        activity_lower,
+        column["geography"],
+        column["product_name"],
+        product_lower,
+        column["unit"],
+        column["amount"],
+        column["biogenic_kg"],
+        column["total_excl_bio_kg"],
+        pc.cast(pc.starts_with(activity_lower, "market"), pa.int64()),
+        pc.binary_join_element_wise(activity_lower, product_lower, " "),
+    ]
+    return zip(*(c.to_pylist() for c in columns))
+
+
+@contextmanager
+def _bulk_load_pragmas(conn: sqlite3.Connection):
+    """Apply _BULK_LOAD_PRAGMAS for the duration of the block."""
+    previous = {
+        name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+        for name in _BULK_LOAD_PRAGMAS
+    }
+    for name, value in _BULK_LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+
 # ---------------------------------------------------------------------------
 # DatasetStore
 # ---------------------------------------------------------------------------
@@ -117,6 +321,12 @@ class DatasetStore:
         self.db_path = db_path
         self._units_cache: Optional[set[str]] = None
         self._geographies_cache: Optional[set[str]] = None
+        self._sorted_units: Optional[list[str]] = None
+        self._sorted_geographies: Optional[list[str]] = None
+        # FTS term -> document count, bounded since terms come from user queries
+        self._term_doc_count = functools.lru_cache(maxsize=_FTS_TERM_CACHE_SIZE)(
+            self._count_term_docs
+        )
 
     def connect(self) -> sqlite3.Connection:
         # Use thread-local connection to avoid conflicts
@@ -141,8 +351,12 @@ class DatasetStore:
     # Initialization: load CSV into SQLite
     # ------------------------------------------------------------------
 
-    def initialize_from_csv(self, csv_path: Path):
-        """Load the ecoinvent CSV into SQLite, creating tables and FTS index."""
+    def initialize_from_csv(self, csv_path: Path, fast_csv: bool = False):
+        """Load the ecoinvent CSV into SQLite, creating tables and FTS index.
+
+        With fast_csv the CSV is parsed with pyarrow (optional dependency)
+        instead of the sqlite3 CLI / Python csv loaders.
+        """
         conn = self.connect()
 
         # Check if already loaded
@@ -156,74 +370,134 @@ class DatasetStore:
 
         logger.info(f"Loading CSV from {csv_path}...")
 
-        # Read CSV with European format
-        df = pd.read_csv(
-            csv_path,
-            sep=";",
-            encoding="utf-8-sig",
-            dtype=str,
-        )
-
-        # Parse European decimals (comma -> dot)
-        for col in ["Biogenic [kg CO2-Eq]", "Total (excl. Biogenic) [kg CO2-Eq]"]:
-            df[col] = df[col].str.replace(",", ".").astype(float)
-
-        df["Reference Product Amount"] = df["Reference Product Amount"].astype(int)
-
-        # Fill missing Geography with empty string (will be treated as unspecified)
-        df["Geography"] = df["Geography"].fillna("")
-
-        # Compute derived columns
-        df["activity_name_lower"] = df["Activity Name"].str.lower().str.strip()
-        df["product_name_lower"] = df["Reference Product Name"].str.lower().str.strip()
-        df["is_market"] = df["activity_name_lower"].str.startswith("market").astype(int)
-        df["search_text"] = df["activity_name_lower"] + " " + df["product_name_lower"]
-
         # Create tables
         conn.executescript(_CREATE_TABLES)
         conn.executescript(_CREATE_JOB_TABLES)
 
-        # Insert data
-        logger.info(f"Inserting {len(df)} rows into SQLite...")
-        for _, row in df.iterrows():
-            conn.execute(
-                """INSERT INTO datasets
-                   (uuid, activity_name, activity_name_lower, geography,
-                    product_name, product_name_lower, unit, amount,
-                    biogenic_kg, total_excl_bio_kg, is_market, search_text)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    row["Activity UUID_Product UUID"],
-                    row["Activity Name"],
-                    row["activity_name_lower"],
-                    row["Geography"],
-                    row["Reference Product Name"],
-                    row["product_name_lower"],
-                    row["Reference Product Unit"],
-                    row["Reference Product Amount"],
-                    row["Biogenic [kg CO2-Eq]"],
-                    row["Total (excl. Biogenic) [kg CO2-Eq]"],
-                    row["is_market"],
-                    row["search_text"],
-                ),
-            )
+        with _bulk_load_pragmas(conn):
+            inserted = self._insert_csv_arrow(conn, csv_path) if fast_csv else None
+            if inserted is None:
+                inserted = self._import_csv_with_cli(conn, csv_path)
+            if inserted is None:
+                inserted = self._insert_csv_rows(conn, csv_path)
+            logger.info(f"Inserted {inserted} rows into SQLite")
+
+            # Secondary indexes and FTS5 index, now that the data is in place
+            logger.info("Building indexes...")
+            conn.executescript(_CREATE_INDEXES)
+            logger.info("Building FTS5 index...")
+            conn.executescript(_CREATE_FTS)
+            conn.execute(_POPULATE_FTS)
+            conn.commit()
+            self._term_doc_count.cache_clear()
+
+        total, market = self.get_row_counts()
+        logger.info(
+            f"Database initialized: {total} total rows, {market} market rows, "
+            f"{total - market} searchable."
+        )
 
+    def drop_datasets(self):
+        """Drop the datasets table and its FTS index, keeping the job tables,
+        so the next initialize_from_csv reloads the CSV."""
+        conn = self.connect()
+        conn.executescript(_DROP_DATASETS)
+        self._units_cache = None
+        self._geographies_cache = None
+        self._sorted_units = None
+        self._sorted_geographies = None
+        self._term_doc_count.cache_clear()
+
+    def _insert_csv_rows(self, conn: sqlite3.Connection, csv_path: Path) -> int:
+        """Stream CSV rows into datasets from Python, in one transaction."""
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f, delimiter=";")
+            header = next(reader)
+            return self._insert_records(conn, _iter_csv_records(reader, header))
+
+    def _insert_csv_arrow(
+        self, conn: sqlite3.Connection, csv_path: Path
+    ) -> Optional[int]:
+        """Parse the CSV with pyarrow's multithreaded reader and derive the
+        datasets columns with Arrow compute kernels, leaving only the inserts
+        to Python.
+
+        Returns the number of rows inserted, or None if pyarrow is not
+        installed (the caller then falls back to the default loaders).
+        """
+        try:
+            records = _iter_arrow_records(csv_path)
+        except ImportError:
+            logger.warning(
+                "pyarrow is not installed (pip install '.[arrow]'); "
+                "using the default CSV loader"
+            )
+            return None
+        return self._insert_records(conn, records)
+
+    @staticmethod
+    def _insert_records(conn: sqlite3.Connection, records: Iterator[tuple]) -> int:
+        """Insert datasets tuples in chunks, in one transaction."""
+        inserted = 0
+        conn.execute("BEGIN")
+        while chunk := list(islice(records, _INSERT_CHUNK_SIZE)):
+            conn.executemany(_INSERT_DATASET, chunk)
+            inserted += len(chunk)
         conn.commit()
+        return inserted
+
+    def _import_csv_with_cli(
+        self, conn: sqlite3.Connection, csv_path: Path
+    ) -> Optional[int]:
+        """Bulk-load the CSV with the sqlite3 CLI's .import, skipping Python
+        row handling, then derive the datasets rows in a single INSERT ... SELECT.
+
+        Returns the number of rows inserted, or None if the CLI is not
+        available or failed (the caller then falls back to _insert_csv_rows).
+        """
+        sqlite3_cli = shutil.which("sqlite3")
+        if sqlite3_cli is None:
+            return None
+
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            header = next(csv.reader(f, delimiter=";"))
+        col = {name: idx for idx, name in enumerate(header)}
+        columns = {field: f"c{col[name]}" for field, name in _CSV_COLUMNS.items()}
 
-        # Create FTS5 index
-        logger.info("Building FTS5 index...")
-        conn.executescript(_CREATE_FTS)
-        conn.execute(_POPULATE_FTS)
+        conn.execute(f"DROP TABLE IF EXISTS {_CSV_STAGING_TABLE}")
+        conn.execute(
+            f"CREATE TABLE {_CSV_STAGING_TABLE} "
+            f"({', '.join(f'c{i} TEXT' for i in range(len(header)))})"
+        )
         conn.commit()
 
-        total = conn.execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
-        market = conn.execute(
-            "SELECT COUNT(*) FROM datasets WHERE is_market = 1"
-        ).fetchone()[0]
-        logger.info(
-            f"Database initialized: {total} total rows, {market} market rows, "
-            f"{total - market} searchable."
+        script = "\n".join([
+            "PRAGMA synchronous=OFF;",
+            ".mode csv",
+            ".separator ;",
+            f'.import --skip 1 "{csv_path}" {_CSV_STAGING_TABLE}',
+        ])
+        try:
+            subprocess.run(
+                [sqlite3_cli, "-bail", str(self.db_path)],
+                input=script, text=True, capture_output=True, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, "stderr", "") or e
+            logger.warning(f"sqlite3 .import failed, loading CSV from Python: {stderr}")
+            conn.execute(f"DROP TABLE IF EXISTS {_CSV_STAGING_TABLE}")
+            conn.commit()
+            return None
+
+        conn.create_function("lower_strip", 1, _lower_strip, deterministic=True)
+        conn.create_function("parse_decimal", 1, _parse_decimal, deterministic=True)
+        conn.execute("BEGIN")
+        cur = conn.execute(
+            _INSERT_FROM_STAGING.format(staging=_CSV_STAGING_TABLE, **columns)
         )
+        conn.execute(f"DROP TABLE {_CSV_STAGING_TABLE}")
+        conn.commit()
+        return cur.rowcount
 
     # ------------------------------------------------------------------
     # Queries
@@ -234,6 +508,7 @@ class DatasetStore:
             id=row["id"],
             uuid=row["uuid"],
             activity_name=row["activity_name"],
+            activity_name_lower=row["activity_name_lower"],
             geography=row["geography"],
             product_name=row["product_name"],
             unit=row["unit"],
@@ -252,57 +527,116 @@ class DatasetStore:
             return None
         return self._row_to_dataset(row)
 
-    def lookup_by_uuids(self, uuids: list[str]) -> list[DatasetRow]:
+    def lookup_by_uuids(self, uuids: list[str]) -> dict[str, DatasetRow]:
+        """Look up several UUIDs in one query. Unknown UUIDs are absent."""
         if not uuids:
-            return []
+            return {}
         conn = self.connect()
-        placeholders = ",".join("?" for _ in uuids)
+        unique = list(dict.fromkeys(uuids))
+        placeholders = ",".join("?" for _ in unique)
         rows = conn.execute(
-            f"SELECT * FROM datasets WHERE uuid IN ({placeholders})", uuids
+            f"SELECT * FROM datasets WHERE uuid IN ({placeholders})", unique
         ).fetchall()
-        return [self._row_to_dataset(r) for r in rows]
+        return {r["uuid"]: self._row_to_dataset(r) for r in rows}
+
+    def get_row_counts(self) -> tuple[int, int]:
+        """Return (total rows, market rows) from a single table scan."""
+        total, market = self.connect().execute(
+            "SELECT COUNT(*), TOTAL(is_market) FROM datasets"
+        ).fetchone()
+        return total, int(market)
 
     def get_all_units(self) -> set[str]:
-        if self._units_cache is not None:
-            return self._units_cache
-        conn = self.connect()
-        rows = conn.execute(
-            "SELECT DISTINCT unit FROM datasets"
-        ).fetchall()
-        self._units_cache = {r["unit"] for r in rows}
+        if self._units_cache is None:
+            self._units_cache = set(self.get_sorted_units())
         return self._units_cache
 
     def get_all_geographies(self) -> set[str]:
-        if self._geographies_cache is not None:
-            return self._geographies_cache
-        conn = self.connect()
-        rows = conn.execute(
-            "SELECT DISTINCT geography FROM datasets"
-        ).fetchall()
-        self._geographies_cache = {r["geography"] for r in rows}
+        if self._geographies_cache is None:
+            self._geographies_cache = set(self.get_sorted_geographies())
         return self._geographies_cache
 
-    def fts_search(self, query: str, limit: int = 100) -> list[tuple[int, float]]:
+    def get_sorted_units(self) -> list[str]:
+        """Distinct units in ascending order (do not modify the list)."""
+        if self._sorted_units is None:
+            self._sorted_units = self._distinct_sorted("unit")
+        return self._sorted_units
+
+    def get_sorted_geographies(self) -> list[str]:
+        """Distinct geographies in ascending order (do not modify the list)."""
+        if self._sorted_geographies is None:
+            self._sorted_geographies = self._distinct_sorted("geography")
+        return self._sorted_geographies
+
+    def _distinct_sorted(self, column: str) -> list[str]:
+        # Walks the column's index in order: no temp B-tree for DISTINCT or
+        # ORDER BY, and BINARY collation sorts like Python's sorted()
+        rows = self.connect().execute(
+            f"SELECT DISTINCT {column} FROM datasets ORDER BY {column}"
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def fts_search(
+        self, query: str, limit: int = 100, exclude_market: bool = False
+    ) -> list[tuple[int, float]]:
         """FTS5 search returning (rowid, bm25_score) pairs.
-        Lower bm25 score = better match (it returns negative values)."""
+        Lower bm25 score = better match (it returns negative values).
+
+        With exclude_market=True, market activities are filtered out."""
         conn = self.connect()
         # Escape special FTS5 characters
         safe_query = query.replace('"', '""')
-        # Use each word as a separate term for broad matching
-        words = safe_query.split()
+        words = list(dict.fromkeys(safe_query.split()))
         if not words:
             return []
-        fts_query = " OR ".join(f'"{w}"' for w in words)
-        rows = conn.execute(
-            f"""SELECT rowid, bm25(datasets_fts) as score
-                FROM datasets_fts
-                WHERE search_text MATCH ?
-                ORDER BY score
-                LIMIT ?""",
-            (fts_query, limit),
-        ).fetchall()
+        fts_query = self._build_fts_query(words)
+        if fts_query is None:
+            return []
+        if exclude_market:
+            sql = """SELECT f.rowid, bm25(datasets_fts) as score
+                     FROM datasets_fts f
+                     JOIN datasets d ON d.id = f.rowid
+                     WHERE datasets_fts MATCH ? AND d.is_market = 0
+                     ORDER BY score
+                     LIMIT ?"""
+        else:
+            sql = """SELECT rowid, bm25(datasets_fts) as score
+                     FROM datasets_fts
+                     WHERE search_text MATCH ?
+                     ORDER BY score
+                     LIMIT ?"""
+        rows = conn.execute(sql, (fts_query, limit)).fetchall()
         return [(r["rowid"], r["score"]) for r in rows]
 
+    def _count_term_docs(self, term: str) -> int:
+        """Number of documents containing an (already escaped) term.
+
+        Called through the LRU-cached self._term_doc_count."""
+        return self.connect().execute(
+            "SELECT COUNT(*) FROM datasets_fts WHERE search_text MATCH ?",
+            (f'"{term}"',),
+        ).fetchone()[0]
+
+    def _build_fts_query(self, words: list[str]) -> Optional[str]:
+        """Build an FTS5 MATCH expression from the most selective query terms.
+
+        Terms are ranked by document frequency (rarest = highest IDF first),
+        terms absent from the index are dropped and at most _FTS_MAX_TERMS
+        are kept. Every kept term is its own OR'ed clause, so recall matches a
+        plain OR query; the two rarest terms are additionally OR'ed in as a
+        NEAR() group, which raises the bm25 rank of rows where they occur
+        close together. Returns None if no term occurs in the index.
+        """
+        doc_counts = {w: self._term_doc_count(w) for w in words}
+        terms = sorted((w for w in words if doc_counts[w] > 0), key=doc_counts.get)
+        terms = terms[:_FTS_MAX_TERMS]
+        if not terms:
+            return None
+        if len(terms) == 1:
+            return f'"{terms[0]}"'
+        near = f'NEAR("{terms[0]}" "{terms[1]}", {_FTS_NEAR_DISTANCE})'
+        return " OR ".join([near] + [f'"{w}"' for w in terms])
+
     def get_non_market_rows(self) -> list[DatasetRow]:
         """Get all non-market rows (for building embeddings index)."""
         conn = self.connect()
@@ -2,7 +2,11 @@
 from __future__ import annotations
 
 import logging
+import math
+import os
 import pickle
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional
 
@@ -11,6 +15,169 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Supported FAISS index layouts:
+#   flat  - exhaustive search over fp32/fp16/int8 vectors (see FLAT_QUANTIZATIONS)
+#   hnsw  - HNSW graph over full vectors (fast approximate search)
+#   ivfpq - inverted lists + product quantization (smallest, approximate)
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# Vector encodings for the flat index (bytes per dimension: 4 / 2 / 1).
+# int8 needs training to learn per-dimension ranges; recall loss is <1%.
+FLAT_QUANTIZATIONS = ("fp32", "fp16", "int8")
+
+# HNSW parameters
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 100
+HNSW_EF_SEARCH = 64
+
+# IVFPQ parameters
+IVFPQ_M = 16  # sub-quantizers; must divide the embedding dimension
+IVFPQ_NBITS = 8
+
+# Indexes that need training are trained on a random sample once the corpus
+# exceeds the threshold; k-means cost grows with the training set size.
+TRAIN_SAMPLE_THRESHOLD = 50_000
+TRAIN_SAMPLE_SIZE = 40_000
+
+# Number of encoded query vectors kept in the LRU cache
+QUERY_CACHE_SIZE = 4096
+
+_NPY_MAGIC = b"\x93NUMPY"
+
+# Max tokens per text for the ONNX encoder (matches the MiniLM
+# SentenceTransformer's max_seq_length)
+ONNX_MAX_SEQ_LENGTH = 128
+
+_torch_threads_configured = False
+
+
+def _configure_torch_threads():
+    """Use all CPU cores for intra-op parallelism. Runs once per process.
+
+    PyTorch's default thread count is conservative on many hosts, which
+    throttles CPU encoding. OMP_NUM_THREADS only takes effect if set before
+    torch is first imported, so it is set here (unless already configured).
+    """
+    global _torch_threads_configured
+    if _torch_threads_configured:
+        return
+    _torch_threads_configured = True
+
+    n_threads = os.cpu_count() or 4
+    os.environ.setdefault("OMP_NUM_THREADS", str(n_threads))
+    import torch
+
+    torch.set_num_threads(n_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before any inter-op parallel work has started
+        pass
+    logger.info(f"torch configured with {n_threads} intra-op threads")
+
+
+def _load_id_map(metadata_path: Path) -> np.ndarray:
+    """Load the position -> row id map of a legacy index.
+
+    Current builds keep the row ids inside the index (IndexIDMap2). Before
+    that they were stored next to it as an int64 .npy array, and before that
+    as a pickled list[int]; both are still accepted.
+    """
+    with open(metadata_path, "rb") as f:
+        is_npy = f.read(len(_NPY_MAGIC)) == _NPY_MAGIC
+        f.seek(0)
+        if is_npy:
+            return np.load(f)
+        logger.info(f"Reading legacy pickled id map from {metadata_path}")
+        return np.asarray(pickle.load(f), dtype=np.int64)
+
+
+def _unwrap_id_map(index: faiss.Index) -> faiss.Index:
+    """The index wrapped by an IndexIDMap/IndexIDMap2, or the index itself."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def _read_index_mmap(index_path: Path) -> Optional[faiss.Index]:
+    """Memory-map a FAISS index read-only, or return None if it can't be.
+
+    IO_FLAG_MMAP alone only maps IVF inverted lists (as OnDiskInvertedLists);
+    flat code storage (the fp16 flat index, HNSW storage) is still copied into
+    RAM unless IO_FLAG_MMAP_IFC is set too. IVF indexes reject that flag, so
+    they are retried with plain IO_FLAG_MMAP.
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    attempts = [flags]
+    if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        attempts.insert(0, flags | faiss.IO_FLAG_MMAP_IFC)
+    for io_flags in attempts:
+        try:
+            return faiss.read_index(str(index_path), io_flags)
+        except RuntimeError as e:
+            error = e
+    logger.warning(f"Cannot mmap {index_path} ({error}); reading it into memory")
+    return None
+
+
+class _OnnxEncoder:
+    """ONNX Runtime stand-in for SentenceTransformer.encode().
+
+    Loads a model exported with `python -m scripts.export_onnx` and applies
+    the same mean pooling as the SentenceTransformer it was exported from.
+    """
+
+    def __init__(self, model_dir: Path):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        file_name = "model_quantized.onnx"
+        if not (model_dir / file_name).exists():
+            file_name = "model.onnx"
+        self._model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=file_name
+        )
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(
+        self,
+        sentences: list[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        """Encode sentences, batching them by length.
+
+        Sentences are sorted by character length before batching so each
+        batch pads to a similar token count (1.5-3x faster on mixed-length
+        activity names), and the output is restored to input order. This is
+        what SentenceTransformer.encode does internally.
+        """
+        order = np.argsort([len(s) for s in sentences], kind="stable")
+        sorted_sentences = [sentences[i] for i in order]
+
+        batches = []
+        for start in range(0, len(sorted_sentences), batch_size):
+            encoded = self._tokenizer(
+                sorted_sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=ONNX_MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            token_embeddings = self._model(**encoded).last_hidden_state
+            # Mean pooling over non-padding tokens
+            mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            batches.append(summed / np.clip(mask.sum(axis=1), 1e-9, None))
+
+        embeddings = np.empty((len(sentences), batches[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.concatenate(batches)
+        if normalize_embeddings:
+            faiss.normalize_L2(embeddings)
+        return embeddings
+
 
 class EmbeddingIndex:
     """Manages sentence embeddings and FAISS index for semantic search."""
@@ -18,20 +185,71 @@ class EmbeddingIndex:
     def __init__(
         self,
         model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        index_type: str = "flat",
+        factory: Optional[str] = None,
+        quantization: str = "fp16",
+        onnx_path: Optional[Path] = None,
+        use_gpu: bool = False,
+        device: Optional[str] = None,
+        fp16: bool = True,
+        processes: int = 1,
     ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index_type '{index_type}'. Expected one of {INDEX_TYPES}"
+            )
+        if quantization not in FLAT_QUANTIZATIONS:
+            raise ValueError(
+                f"Unknown quantization '{quantization}'. "
+                f"Expected one of {FLAT_QUANTIZATIONS}"
+            )
         self.model_name = model_name
+        self.index_type = index_type
+        # faiss.index_factory description, e.g. "OPQ32_64,IVF4096,PQ32" or
+        # "HNSW32,Flat"; overrides index_type when set
+        self.factory = factory or None
+        self.quantization = quantization  # vector encoding of the flat index
+        self.onnx_path = onnx_path  # exported ONNX model dir, used if present
+        self.use_gpu = use_gpu  # search on GPU 0 when faiss has CUDA support
+        self.device = device or None  # torch device for the encoder; None = auto
+        self.fp16 = fp16  # encode in half precision on GPU devices
+        self.processes = processes  # CPU encoder processes in build_index; 0 = per core
+        self._gpu_resources = None
         self._model = None
         self._index: Optional[faiss.Index] = None
-        self._id_map: list[int] = []  # position -> dataset row id
+        # position -> dataset row id for legacy indexes; None when the index
+        # returns dataset row ids itself (IndexIDMap2)
+        self._id_map: Optional[np.ndarray] = None
+        self._embeddings: Optional[np.ndarray] = None  # fp16 row vectors from build_index
+        # (model_name, query_text) -> normalized float32 embedding, LRU order
+        self._query_cache: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     @property
     def model(self):
+        if self._model is None and self.onnx_path is not None and self.onnx_path.exists():
+            logger.info(f"Loading ONNX embedding model from {self.onnx_path}")
+            self._model = _OnnxEncoder(self.onnx_path)
         if self._model is None:
+            _configure_torch_threads()
             from sentence_transformers import SentenceTransformer
             logger.info(f"Loading embedding model: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            model = SentenceTransformer(self.model_name, device=self.device)
+            if self.fp16 and model.device.type in ("cuda", "mps"):
+                # FP16 roughly halves encode time and GPU memory; cosine
+                # similarities drift by ~1e-5. CPUs stay on FP32, where
+                # half/bfloat16 kernels are usually slower.
+                model.half()
+                logger.info(f"Embedding model running in FP16 on {model.device.type}")
+            self._model = model
         return self._model
 
+    def warm_up(self):
+        """Load the encoder and run one encode, so tokenizer and kernel setup
+        are done before the first real batch. Safe to run in a background
+        thread as long as nothing else uses the model until it returns."""
+        self.model.encode(["warm-up"], batch_size=1, convert_to_numpy=True)
+
     @property
     def is_loaded(self) -> bool:
         return self._index is not None
@@ -41,71 +259,356 @@ class EmbeddingIndex:
 
         Args:
             texts_with_ids: list of (dataset.id, search_text) tuples
-            batch_size: encoding batch size
+            batch_size: encoding batch size. The encoder sorts texts by
+                length before batching, so batches pad to similar lengths.
         """
         ids = [t[0] for t in texts_with_ids]
         texts = [t[1] for t in texts_with_ids]
 
-        logger.info(f"Encoding {len(texts)} texts with {self.model_name}...")
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=True,
-            normalize_embeddings=True,
+        # The same activity/product pair recurs across geographies: encode
+        # each distinct text once and scatter the vectors back to all rows.
+        positions: dict[str, int] = {}
+        inverse = np.fromiter(
+            (positions.setdefault(t, len(positions)) for t in texts),
+            dtype=np.int64,
+            count=len(texts),
+        )
+        unique_texts = list(positions)
+
+        logger.info(
+            f"Encoding {len(unique_texts)} distinct texts "
+            f"({len(texts)} rows) with {self.model_name}..."
         )
+        if self._use_process_pool():
+            embeddings = self._encode_multi_process(unique_texts, batch_size)
+        else:
+            embeddings = self.model.encode(
+                unique_texts,
+                batch_size=batch_size,
+                show_progress_bar=True,
+                convert_to_numpy=True,
+            )
+        # Only FP16 (GPU) output needs a float32 copy. Normalizing the whole
+        # float32 matrix once is a single SIMD pass and, unlike per-batch
+        # normalization inside the encoder, exact for FP16 models too.
+        embeddings = np.ascontiguousarray(embeddings.astype(np.float32, copy=False))
+        faiss.normalize_L2(embeddings)
+        embeddings = embeddings[inverse]
+        self._embeddings = embeddings.astype(np.float16)
 
         dim = embeddings.shape[1]
-        logger.info(f"Building FAISS index: {len(texts)} vectors x {dim} dimensions")
+        logger.info(
+            f"Building FAISS {self.factory or self.index_type} index: "
+            f"{len(texts)} vectors x {dim} dimensions"
+        )
 
-        # Use IndexFlatIP (inner product = cosine similarity for normalized vectors)
-        self._index = faiss.IndexFlatIP(dim)
-        self._index.add(embeddings.astype(np.float32))
-        self._id_map = ids
+        # Store the dataset row ids in the index so searches return them
+        # directly. IndexIDMap2 also supports reconstruct() by row id.
+        index = self._create_index(dim, len(texts))
+        if not isinstance(index, faiss.IndexIDMap):  # factory may include IDMap
+            index = faiss.IndexIDMap2(index)
+        self._index = index
+        self._train_and_add(embeddings, np.asarray(ids, dtype=np.int64))
+        self._id_map = None
+        self._configure_search()
+        self._maybe_to_gpu()
 
         logger.info(f"FAISS index built with {self._index.ntotal} vectors")
 
-    def save(self, index_path: Path, metadata_path: Path):
-        """Save FAISS index and id mapping to disk."""
+    def _use_process_pool(self) -> bool:
+        """Whether build_index should encode on a pool of CPU processes.
+
+        Only applies to the PyTorch SentenceTransformer running on CPU; GPU
+        encoding and the ONNX encoder stay in-process.
+        """
+        if self.processes == 1:
+            return False
+        model = self.model
+        return (
+            hasattr(model, "encode_multi_process")
+            and model.device.type == "cpu"
+        )
+
+    def _encode_multi_process(self, texts: list[str], batch_size: int) -> np.ndarray:
+        """Encode with SentenceTransformer.encode_multi_process on CPU workers.
+
+        Each worker gets contiguous chunks of the texts and runs torch with a
+        single thread, so N processes don't each spin up cpu_count() threads.
+        """
+        n_processes = self.processes or os.cpu_count() or 1
+        logger.info(f"Encoding on {n_processes} CPU processes")
+        # Workers are spawned and read OMP_NUM_THREADS when importing torch
+        previous = os.environ.get("OMP_NUM_THREADS")
+        os.environ["OMP_NUM_THREADS"] = "1"
+        try:
+            pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * n_processes
+            )
+        finally:
+            if previous is None:
+                del os.environ["OMP_NUM_THREADS"]
+            else:
+                os.environ["OMP_NUM_THREADS"] = previous
+        try:
+            return self.model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+    def _train_and_add(self, embeddings: np.ndarray, ids: np.ndarray):
+        """Train the new index and add the embeddings, on all GPUs if faiss
+        has CUDA support.
+
+        IVF k-means training and adds run 10-50x faster on GPU; the filled
+        index is copied back to the CPU so it can be saved. Index types
+        without a GPU implementation (HNSW, the flat scalar quantizers) are
+        built on the CPU.
+        """
+        index = self._index
+        if hasattr(faiss, "index_cpu_to_all_gpus") and faiss.get_num_gpus() > 0:
+            try:
+                index = faiss.index_cpu_to_all_gpus(self._index)
+                logger.info(f"Training and adding on {faiss.get_num_gpus()} GPU(s)")
+            except RuntimeError as e:
+                logger.info(f"Building index on CPU (no GPU implementation): {e}")
+
+        if not index.is_trained:
+            index.train(self._training_sample(embeddings))
+        index.add_with_ids(embeddings, ids)
+
+        if index is not self._index:
+            self._index = faiss.index_gpu_to_cpu(index)
+
+    @staticmethod
+    def _training_sample(embeddings: np.ndarray) -> np.ndarray:
+        """Random subset of the embeddings to train on for large corpora."""
+        if len(embeddings) <= TRAIN_SAMPLE_THRESHOLD:
+            return embeddings
+        rng = np.random.default_rng(1234)
+        sample = rng.choice(len(embeddings), TRAIN_SAMPLE_SIZE, replace=False)
+        logger.info(f"Training on a random sample of {TRAIN_SAMPLE_SIZE} vectors")
+        return embeddings[np.sort(sample)]
+
+    def _create_index(self, dim: int, n_vectors: int) -> faiss.Index:
+        """Create an empty (untrained) FAISS index of the configured type.
+
+        All index types use inner product, i.e. cosine similarity for the
+        normalized embeddings.
+        """
+        if self.factory:
+            return faiss.index_factory(dim, self.factory, faiss.METRIC_INNER_PRODUCT)
+
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return index
+
+        if self.index_type == "ivfpq":
+            nlist = max(int(2 * math.sqrt(n_vectors)), 20)
+            quantizer = faiss.IndexFlatIP(dim)
+            return faiss.IndexIVFPQ(
+                quantizer, dim, nlist, IVFPQ_M, IVFPQ_NBITS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+
+        # Exhaustive inner-product search. fp16 codes halve the memory and
+        # scan bandwidth of IndexFlatIP with negligible loss in ranking
+        # quality; int8 quarters them.
+        if self.quantization == "fp32":
+            return faiss.IndexFlatIP(dim)
+        qtype = (
+            faiss.ScalarQuantizer.QT_8bit
+            if self.quantization == "int8"
+            else faiss.ScalarQuantizer.QT_fp16
+        )
+        return faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+
+    def _configure_search(self):
+        """Apply search-time parameters for approximate index types.
+
+        IVF probes up to 10 lists on small indexes and 1 in 50 lists on
+        large ones (e.g. 81 for IVF4096), but never fewer than 2.
+        """
+        ivf = faiss.try_extract_index_ivf(self._index)
+        base = _unwrap_id_map(self._index)
+        if ivf is not None:
+            nlist = ivf.nlist
+            ivf.nprobe = min(max(2, min(nlist // 4, 10), nlist // 50), nlist)
+        elif isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = HNSW_EF_SEARCH
+
+    def _maybe_to_gpu(self):
+        """Move the index to GPU 0 if requested and a GPU is available.
+
+        Search parameters set by _configure_search are carried over by the
+        cloner. Index types without a GPU implementation (HNSW, the flat
+        scalar quantizers) stay on the CPU.
+        """
+        if not self.use_gpu:
+            return
+        if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+            logger.warning("use_gpu set but no FAISS GPU support found; searching on CPU")
+            return
+        if self._gpu_resources is None:
+            self._gpu_resources = faiss.StandardGpuResources()
+        options = faiss.GpuClonerOptions()
+        # fp16 lookup tables / storage halve on-device memory for IVFPQ
+        options.useFloat16 = isinstance(_unwrap_id_map(self._index), faiss.IndexIVFPQ)
+        try:
+            self._index = faiss.index_cpu_to_gpu(
+                self._gpu_resources, 0, self._index, options
+            )
+        except RuntimeError as e:
+            logger.warning(f"Could not move {self.index_type} index to GPU: {e}")
+            return
+        logger.info("FAISS index moved to GPU 0")
+
+    def save(self, index_path: Path, embeddings_path: Optional[Path] = None):
+        """Save the FAISS index (including its dataset row ids) to disk.
+
+        If embeddings_path is given and the index was built in this process,
+        the normalized row vectors are also written there as float16 (half
+        the size of fp32, within noise for cosine ranking), in the order the
+        rows were passed to build_index.
+        """
         index_path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self._index, str(index_path))
-        with open(metadata_path, "wb") as f:
-            pickle.dump(self._id_map, f)
+        index = self._index
+        if hasattr(faiss, "GpuIndex") and isinstance(_unwrap_id_map(index), faiss.GpuIndex):
+            index = faiss.index_gpu_to_cpu(index)
+        faiss.write_index(index, str(index_path))
+        if embeddings_path is not None and self._embeddings is not None:
+            # Write through a file handle so np.save doesn't append ".npy"
+            with open(embeddings_path, "wb") as f:
+                np.save(f, self._embeddings)
         logger.info(f"Index saved to {index_path} ({index_path.stat().st_size / 1024 / 1024:.1f} MB)")
 
-    def load(self, index_path: Path, metadata_path: Path):
-        """Load pre-built FAISS index and id mapping."""
-        if not index_path.exists() or not metadata_path.exists():
+    def load(
+        self,
+        index_path: Path,
+        metadata_path: Optional[Path] = None,
+        mmap: bool = True,
+    ):
+        """Load a pre-built FAISS index.
+
+        metadata_path is only read for indexes built before the row ids were
+        stored in the index; it is ignored otherwise.
+
+        With mmap=True the index file is memory-mapped read-only: loading is
+        near-instant and the pages are shared between worker processes. The
+        file must then stay on local disk (mmap over NFS is unreliable) and
+        the loaded index cannot be modified.
+        """
+        if not index_path.exists():
             raise FileNotFoundError(
-                f"Index files not found: {index_path}, {metadata_path}. "
+                f"Index file not found: {index_path}. "
                 f"Run `python -m scripts.build_index` first."
             )
-        self._index = faiss.read_index(str(index_path))
-        with open(metadata_path, "rb") as f:
-            self._id_map = pickle.load(f)
+        index = _read_index_mmap(index_path) if mmap else None
+        if index is None:
+            index = faiss.read_index(str(index_path))
+
+        id_map = None
+        if not isinstance(index, faiss.IndexIDMap):
+            if metadata_path is None or not metadata_path.exists():
+                raise FileNotFoundError(
+                    f"{index_path} has no row ids and the id map {metadata_path} "
+                    f"is missing. Run `python -m scripts.build_index` first."
+                )
+            id_map = _load_id_map(metadata_path)
+
+        self._index = index
+        self._id_map = id_map
+        self._configure_search()
+        self._maybe_to_gpu()
         logger.info(
-            f"Loaded FAISS index: {self._index.ntotal} vectors, "
-            f"{len(self._id_map)} id mappings"
+            f"Loaded FAISS index: {self._index.ntotal} vectors"
+            + (f", {len(id_map)} legacy id mappings" if id_map is not None else "")
         )
 
+    @staticmethod
+    def load_embeddings(embeddings_path: Path, mmap: bool = True) -> np.ndarray:
+        """Load row vectors written by save(), in build_index row order.
+
+        The array stays float16; with mmap=True it is memory-mapped and only
+        the rows that are read get paged in. Cast slices with
+        .astype(np.float32) where FAISS needs full precision.
+        """
+        return np.load(embeddings_path, mmap_mode="r" if mmap else None)
+
     def search(self, query_text: str, top_k: int = 100) -> list[tuple[int, float]]:
         """Search for similar texts, returning (dataset_row_id, score) pairs.
 
         Higher score = better match (cosine similarity).
         """
+        return self.search_batch([query_text], top_k=top_k)[0]
+
+    def search_batch(
+        self, queries: list[str], top_k: int = 100
+    ) -> list[list[tuple[int, float]]]:
+        """Search several queries at once, one result list per query.
+
+        All uncached queries are encoded in a single model call and the index
+        is searched once with the (B, d) query matrix.
+        """
         if self._index is None:
             raise RuntimeError("Index not loaded. Call load() or build_index() first.")
+        if not queries:
+            return []
 
-        query_embedding = self.model.encode(
-            [query_text], normalize_embeddings=True
-        ).astype(np.float32)
+        query_embeddings = self.encode_queries(queries)
+        distances, indices = self._index.search(query_embeddings, top_k)
 
-        distances, indices = self._index.search(query_embedding, top_k)
+        return self._gather_results(distances, indices)
 
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx == -1:  # FAISS returns -1 for no result
-                break
-            row_id = self._id_map[idx]
-            results.append((row_id, float(dist)))
+    def _gather_results(
+        self, distances: np.ndarray, indices: np.ndarray
+    ) -> list[list[tuple[int, float]]]:
+        """Turn a whole (B, k) FAISS result into (row_id, score) lists.
 
+        Current indexes return dataset row ids directly; legacy indexes are
+        mapped with a single vectorized take over the batch. FAISS pads short
+        result lists with -1; only rows containing padding are masked.
+        """
+        if self._id_map is None:
+            row_ids = indices
+        else:
+            # -1 wraps to the last id here; those slots are dropped below
+            row_ids = self._id_map.take(indices)
+        padded = (indices == -1).any(axis=1)
+
+        results = []
+        for b in range(indices.shape[0]):
+            ids, dists = row_ids[b], distances[b]
+            if padded[b]:
+                valid = indices[b] != -1
+                ids, dists = ids[valid], dists[valid]
+            results.append(list(zip(ids.tolist(), dists.tolist())))
         return results
+
+    def encode_queries(self, queries: list[str]) -> np.ndarray:
+        """Encode queries into a (B, d) float32 matrix, reusing cached vectors."""
+        vectors: list[Optional[np.ndarray]] = [None] * len(queries)
+        with self._query_cache_lock:
+            for i, text in enumerate(queries):
+                key = (self.model_name, text)
+                cached = self._query_cache.get(key)
+                if cached is not None:
+                    self._query_cache.move_to_end(key)
+                    vectors[i] = cached
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = self.model.encode(
+                [queries[i] for i in missing],
+                batch_size=64,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+            ).astype(np.float32, copy=False)
+            with self._query_cache_lock:
+                for i, embedding in zip(missing, encoded):
+                    embedding.flags.writeable = False  # shared by all cache hits
+                    vectors[i] = embedding
+                    self._query_cache[(self.model_name, queries[i])] = embedding
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack(vectors)
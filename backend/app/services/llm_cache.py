@@ -0,0 +1,265 @@
+"""SQLite-backed caches for Claude responses and unit conversions."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import faiss
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key         TEXT PRIMARY KEY,
+    response    TEXT NOT NULL,
+    created_at  TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS llm_results (
+    key         TEXT PRIMARY KEY,
+    result      TEXT NOT NULL,
+    created_at  TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS unit_conversions (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    reference_unit      TEXT NOT NULL,
+    dataset_unit        TEXT NOT NULL,
+    embedding_model     TEXT NOT NULL,
+    product_context     TEXT NOT NULL,
+    embedding           BLOB NOT NULL,
+    conversion_factor   REAL NOT NULL,
+    explanation         TEXT NOT NULL,
+    created_at          TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_unit_conversions_bucket
+    ON unit_conversions(reference_unit, dataset_unit, embedding_model);
+"""
+
+
+def _ttl_modifier(ttl_seconds: Optional[float]) -> str:
+    """datetime() modifier for the oldest entry still within the TTL."""
+    return f"-{ttl_seconds or 0} seconds"
+
+
+def make_cache_key(**request: Any) -> str:
+    """SHA-256 over the canonical JSON of everything that shapes a response
+    (model, sampling params, system prompt, messages)."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Persists LLM responses keyed by request hash.
+
+    Holds raw response texts (llm_responses) and parsed, validated results
+    as JSON (llm_results). Entries older than ttl_seconds are ignored;
+    None keeps them forever.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: Optional[float] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_CREATE_TABLES)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT response FROM llm_responses
+                   WHERE key = ? AND (? OR created_at >= datetime('now', ?))""",
+                (key, self.ttl_seconds is None, _ttl_modifier(self.ttl_seconds)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_result(self, key: str) -> Optional[Any]:
+        """Return a parsed result stored with put_result, if still fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT result FROM llm_results
+                   WHERE key = ? AND (? OR created_at >= datetime('now', ?))""",
+                (key, self.ttl_seconds is None, _ttl_modifier(self.ttl_seconds)),
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put_result(self, key: str, result: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, result) VALUES (?, ?)",
+                (key, orjson.dumps(result).decode()),
+            )
+            self._conn.commit()
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response) VALUES (?, ?)",
+                (key, response),
+            )
+            self._conn.commit()
+
+    def discard(self, key: str):
+        """Drop an entry, e.g. when its response turned out to be unusable."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class UnitConversionCache:
+    """Semantic cache for LLM unit conversions.
+
+    Conversions are bucketed by (reference_unit, dataset_unit, embedding
+    model). Each bucket holds an inner-product FAISS index over the
+    normalized embeddings of the product contexts seen so far; a new context
+    whose nearest neighbour reaches the similarity threshold reuses that
+    neighbour's conversion instead of asking the LLM again. Conversions
+    older than ttl_seconds are ignored; None keeps them forever.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # bucket -> (index, [{"conversion_factor", "explanation"}, ...], [created_at epoch, ...])
+        self._buckets: dict[
+            tuple[str, str, str], tuple[faiss.Index, list[dict], list[float]]
+        ] = {}
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Caches created before the TTL existed lack created_at; their rows
+        # get the epoch, so any TTL treats them as expired
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(unit_conversions)")
+        }
+        if columns and "created_at" not in columns:
+            self._conn.execute(
+                "ALTER TABLE unit_conversions ADD COLUMN "
+                "created_at TEXT NOT NULL DEFAULT '1970-01-01 00:00:00'"
+            )
+        self._conn.executescript(_CREATE_TABLES)
+        self._conn.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and created_at < time.time() - self.ttl_seconds
+
+    def _get_bucket(
+        self, bucket: tuple[str, str, str], dim: int
+    ) -> tuple[faiss.Index, list[dict], list[float]]:
+        """Return a bucket's index, entries and creation times, loading the
+        entries still within the TTL from disk on first use."""
+        if bucket not in self._buckets:
+            index = faiss.IndexFlatIP(dim)
+            entries: list[dict] = []
+            created: list[float] = []
+            rows = self._conn.execute(
+                """SELECT embedding, conversion_factor, explanation,
+                          CAST(strftime('%s', created_at) AS REAL)
+                   FROM unit_conversions
+                   WHERE reference_unit = ? AND dataset_unit = ? AND embedding_model = ?
+                     AND (? OR created_at >= datetime('now', ?))
+                   ORDER BY id""",
+                (*bucket, self.ttl_seconds is None, _ttl_modifier(self.ttl_seconds)),
+            ).fetchall()
+            if rows:
+                vectors = np.stack([np.frombuffer(r[0], dtype=np.float32) for r in rows])
+                index.add(vectors)
+                entries = [
+                    {"conversion_factor": r[1], "explanation": r[2]} for r in rows
+                ]
+                created = [r[3] for r in rows]
+            self._buckets[bucket] = (index, entries, created)
+        return self._buckets[bucket]
+
+    def lookup(
+        self,
+        reference_unit: str,
+        dataset_unit: str,
+        embedding_model: str,
+        context_embedding: np.ndarray,
+    ) -> Optional[dict]:
+        """Return a cached conversion for a near-identical product context."""
+        vector = np.ascontiguousarray(context_embedding, dtype=np.float32)[np.newaxis, :]
+        bucket = (reference_unit, dataset_unit, embedding_model)
+        with self._lock:
+            index, entries, created = self._get_bucket(bucket, vector.shape[1])
+            if index.ntotal == 0:
+                return None
+            scores, positions = index.search(vector, 1)
+            if self._is_expired(created[positions[0][0]]):
+                # Entries aged past the TTL while loaded; reload without them
+                del self._buckets[bucket]
+                index, entries, created = self._get_bucket(bucket, vector.shape[1])
+                if index.ntotal == 0:
+                    return None
+                scores, positions = index.search(vector, 1)
+        if scores[0][0] < self.similarity_threshold:
+            return None
+        logger.info(
+            f"Unit conversion cache hit ({reference_unit} -> {dataset_unit}, "
+            f"similarity {scores[0][0]:.3f})"
+        )
+        return dict(entries[positions[0][0]])
+
+    def add(
+        self,
+        reference_unit: str,
+        dataset_unit: str,
+        embedding_model: str,
+        product_context: str,
+        context_embedding: np.ndarray,
+        conversion: dict,
+    ):
+        """Store a conversion obtained from the LLM."""
+        vector = np.ascontiguousarray(context_embedding, dtype=np.float32)[np.newaxis, :]
+        bucket = (reference_unit, dataset_unit, embedding_model)
+        with self._lock:
+            index, entries, created = self._get_bucket(bucket, vector.shape[1])
+            self._conn.execute(
+                """INSERT INTO unit_conversions
+                   (reference_unit, dataset_unit, embedding_model, product_context,
+                    embedding, conversion_factor, explanation, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))""",
+                (
+                    *bucket,
+                    product_context,
+                    vector.tobytes(),
+                    conversion["conversion_factor"],
+                    conversion["explanation"],
+                ),
+            )
+            self._conn.commit()
+            index.add(vector)
+            entries.append({
+                "conversion_factor": conversion["conversion_factor"],
+                "explanation": conversion["explanation"],
+            })
+            created.append(time.time())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,12 +1,17 @@
 """Claude API integration for candidate selection and decomposition."""
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
 import logging
+import time
 from pathlib import Path
 from typing import Optional
 
 import anthropic
+import fastjsonschema
+import numpy as np
+import orjson
 
 from app.models import (
     AmbiguousCandidate,
@@ -16,11 +21,331 @@ from app.models import (
     InputRow,
     LLMDecision,
 )
+from app.services.candidate_retriever import map_unit
+from app.services.embedding_builder import EmbeddingIndex
+from app.services.llm_cache import (
+    LLMResponseCache,
+    UnitConversionCache,
+    make_cache_key,
+)
 
 logger = logging.getLogger(__name__)
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
+# Backoff once the client's own retries gave up on a 429: 10s, 20s, 40s, 80s
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 10
+
+# (reference unit, dataset unit) pairs, after map_unit and lowercasing, whose
+# factor does not depend on the product; convert_unit asks for these once
+# without product context and shares the answer across all rows
+_CONTEXT_FREE_UNIT_PAIRS = frozenset({
+    ("kwh", "mj"), ("mj", "kwh"),
+    ("mwh", "kwh"), ("mwh", "mj"), ("gj", "mj"), ("gj", "kwh"),
+    ("t", "kg"), ("g", "kg"),
+    ("m3", "l"), ("l", "m3"), ("ml", "l"),
+    ("m", "km"), ("km", "m"),
+})
+
+# Size of the in-process memo in front of the unit conversion caches
+UNIT_CONVERSION_MEMO_SIZE = 1024
+
+# Marks the end of a prompt prefix that Anthropic may cache across requests
+_EPHEMERAL = {"type": "ephemeral"}
+
+SYSTEM_PROMPT = (PROMPTS_DIR / "system_prompt.txt").read_text()
+SELECTION_RULES = (PROMPTS_DIR / "candidate_selection_rules.txt").read_text()
+SELECTION_TEMPLATE = (PROMPTS_DIR / "candidate_selection.txt").read_text()
+
+# System prompt as a content block marked for prompt caching
+_SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": _EPHEMERAL}]
+
+# Values for SELECTION_TEMPLATE fields missing from an input row
+_SELECTION_DEFAULTS = {
+    "bezeichnung": "",
+    "produktinformationen": "",
+    "referenzeinheit": "",
+    "region_norm": "GLO",
+}
+
+_COMPONENT_RULES = """Task: Select the best emission dataset for this component. You MUST choose either "match" or "ambiguous" - decomposition is NOT allowed for components. The input component and its candidates follow after these instructions.
+
+Rules:
+- Prefer cradle-to-gate production processes.
+- Prefer region order: requested region > GLO > RoW.
+- Prefer unit match to Referenzeinheit.
+- If ONE candidate is clearly the best match, choose "match" and return its UUID.
+- If multiple candidates are plausible, choose "ambiguous" and return a ranked list of up to 10 options.
+- IMPORTANT: Decomposition is NOT ALLOWED. You must pick from the provided candidates.
+
+Respond by calling exactly one tool: select_match or report_ambiguous."""
+
+# Per-request part of a component prompt; filled like SELECTION_TEMPLATE
+_COMPONENT_TEMPLATE = """Input component:
+- Bezeichnung: "{bezeichnung}"
+- Produktinformationen: "{produktinformationen}"
+- Referenzeinheit: "{referenzeinheit}"
+- Region: "{region_norm}"
+
+Candidates (each is a row from the ecoinvent database - do not modify any strings):
+{candidates_json}"""
+
+_DECOMPOSITION_RULES = """Decompose the product below into physical components for emission factor calculation.
+
+You are decomposing exactly 1 unit (the Referenzeinheit) of the product.
+Each component is a FRACTION of that 1 unit.
+The fractions MUST add up to EXACTLY 1.0.
+
+EXAMPLE: Decomposing 1 kg Hamburger:
+  beef patty:  0.35 kg
+  wheat bun:   0.25 kg
+  cheese:      0.15 kg
+  lettuce:     0.08 kg
+  tomato:      0.07 kg
+  onion:       0.05 kg
+  condiments:  0.05 kg
+  ─────────────────────
+  TOTAL:       1.00 kg  <-- MUST equal 1.0
+
+WRONG (DO NOT DO THIS):
+  beef: 0.10 kg, bun: 0.08 kg, cheese: 0.02 kg = 0.20 kg TOTAL
+  This is WRONG because 0.20 ≠ 1.0 kg!
+
+Rules:
+- 3-10 physical components
+- Use English search queries for each component (for ecoinvent database)
+- component_label should be descriptive (e.g., "beef patty", "wheat bun", NOT generic "materials")
+- List all assumptions about composition, weights, etc.
+
+Respond by calling the decompose tool."""
+
+_UNIT_CONVERSION_RULES = """You are a unit conversion expert. Convert between the units given below.
+
+Use your knowledge about:
+- Energy content (e.g., 1 liter diesel ≈ 36 MJ)
+- Weight conversions
+- Volume conversions
+- Any other relevant physical properties
+
+Respond by calling the convert_unit tool.
+
+Example for "1 liter diesel" to "MJ":
+  conversion_factor: 36.0
+  explanation: "1 liter of diesel contains approximately 36 MJ of energy (lower heating value)"
+"""
+
+
+def _user_message(static_text: str, dynamic_text: str) -> dict:
+    """User turn with static instructions first, marked for prompt caching,
+    followed by the per-request part."""
+    return {
+        "role": "user",
+        "content": [
+            {"type": "text", "text": static_text, "cache_control": _EPHEMERAL},
+            {"type": "text", "text": dynamic_text},
+        ],
+    }
+
+
+def _log_prompt_cache_usage(response):
+    """Log how much of the prompt was served from Anthropic's prompt cache."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    logger.info(
+        f"LLM usage: {usage.input_tokens} input tokens, "
+        f"{getattr(usage, 'cache_read_input_tokens', None) or 0} cache read, "
+        f"{getattr(usage, 'cache_creation_input_tokens', None) or 0} cache write"
+    )
+
+
+# Tool inputs for the three decision types. _parse_response wraps a tool
+# call as {"decision": ..., <decision>: input} and validates it against
+# _RESPONSE_SCHEMA; missing optional fields are filled in from the defaults.
+_MATCH_SCHEMA = {
+    "type": "object",
+    "required": ["UUID"],
+    "properties": {
+        "UUID": {
+            "type": "string",
+            "description": "UUID copied exactly from the candidate list",
+        },
+    },
+}
+
+_AMBIGUOUS_SCHEMA = {
+    "type": "object",
+    "required": ["options"],
+    "properties": {
+        "options": {
+            "type": "array",
+            "description": "Plausible candidates, best first",
+            "items": {
+                "type": "object",
+                "required": ["UUID"],
+                "properties": {
+                    "UUID": {"type": "string"},
+                    "why_short": {
+                        "type": "string",
+                        "description": "Short reason this candidate is plausible",
+                        "default": "",
+                    },
+                },
+            },
+        },
+    },
+}
+
+_DECOMPOSE_SCHEMA = {
+    "type": "object",
+    "required": ["components"],
+    "properties": {
+        "assumptions": {
+            "type": "array",
+            "items": {"type": "string"},
+            "default": [],
+        },
+        "components": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": [
+                    "component_label",
+                    "assumed_quantity",
+                    "assumed_unit",
+                    "search_query_text",
+                ],
+                "properties": {
+                    "component_label": {"type": "string"},
+                    # float() below also accepts numeric strings
+                    "assumed_quantity": {"type": ["number", "string"]},
+                    "assumed_unit": {"type": "string"},
+                    "search_query_text": {
+                        "type": "string",
+                        "description": "English search query for the ecoinvent database",
+                    },
+                },
+            },
+        },
+    },
+}
+
+_RESPONSE_SCHEMA = {
+    "type": "object",
+    "required": ["decision"],
+    "oneOf": [
+        {
+            "properties": {"decision": {"const": "match"}, "match": _MATCH_SCHEMA},
+            "required": ["match"],
+        },
+        {
+            "properties": {
+                "decision": {"const": "ambiguous"},
+                "ambiguous": _AMBIGUOUS_SCHEMA,
+            },
+            "required": ["ambiguous"],
+        },
+        {
+            "properties": {
+                "decision": {"const": "decompose"},
+                "decompose": _DECOMPOSE_SCHEMA,
+            },
+            "required": ["decompose"],
+        },
+    ],
+}
+
+_MATCH_TOOL = {
+    "name": "select_match",
+    "description": "Exactly one candidate fits the input.",
+    "input_schema": _MATCH_SCHEMA,
+}
+_AMBIGUOUS_TOOL = {
+    "name": "report_ambiguous",
+    "description": "Two or more candidates are plausible; a human picks one.",
+    "input_schema": _AMBIGUOUS_SCHEMA,
+}
+_DECOMPOSE_TOOL = {
+    "name": "decompose",
+    "description": "Split 1 unit of the product into physical components.",
+    "input_schema": _DECOMPOSE_SCHEMA,
+}
+_UNIT_CONVERSION_TOOL = {
+    "name": "convert_unit",
+    "description": "Report how many dataset units represent 1 reference unit.",
+    "input_schema": {
+        "type": "object",
+        "required": ["conversion_factor", "explanation"],
+        "properties": {
+            "conversion_factor": {"type": "number"},
+            "explanation": {
+                "type": "string",
+                "description": "Brief explanation of how the conversion was calculated",
+            },
+        },
+    },
+}
+
+# Tool name -> decision type
+_TOOL_DECISIONS = {
+    _MATCH_TOOL["name"]: "match",
+    _AMBIGUOUS_TOOL["name"]: "ambiguous",
+    _DECOMPOSE_TOOL["name"]: "decompose",
+}
+
+# Tool sets per request kind; "any" makes Claude answer with one tool call
+_SELECTION_TOOLS = {
+    "tools": [_MATCH_TOOL, _AMBIGUOUS_TOOL, _DECOMPOSE_TOOL],
+    "tool_choice": {"type": "any"},
+}
+_COMPONENT_TOOLS = {
+    "tools": [_MATCH_TOOL, _AMBIGUOUS_TOOL],
+    "tool_choice": {"type": "any"},
+}
+_DECOMPOSITION_TOOLS = {
+    "tools": [_DECOMPOSE_TOOL],
+    "tool_choice": {"type": "tool", "name": _DECOMPOSE_TOOL["name"]},
+}
+_UNIT_CONVERSION_TOOLS = {
+    "tools": [_UNIT_CONVERSION_TOOL],
+    "tool_choice": {"type": "tool", "name": _UNIT_CONVERSION_TOOL["name"]},
+}
+
+
+@functools.cache
+def _response_validator():
+    """Compile _RESPONSE_SCHEMA once per process.
+
+    The validator raises fastjsonschema.JsonSchemaValueException, a
+    ValueError, like the other checks in _parse_response.
+    """
+    return fastjsonschema.compile(_RESPONSE_SCHEMA)
+
+
+def _dumps_candidates(candidates: list[CandidateResult]) -> str:
+    """Candidate list as indented JSON for the prompt (non-ASCII kept as is).
+
+    Joins the per-candidate prompt_json fragments, indented one level, so
+    each candidate is encoded only once however often it is prompted.
+    """
+    if not candidates:
+        return "[]"
+    return "[\n  " + ",\n  ".join(
+        c.prompt_json.replace("\n", "\n  ") for c in candidates
+    ) + "\n]"
+
+
+def _tool_call(message) -> dict:
+    """The tool call in a Messages API response, as a plain dict.
+
+    Raises ValueError if Claude did not call a tool (e.g. it hit max_tokens).
+    """
+    for block in message.content:
+        if block.type == "tool_use":
+            return {"id": block.id, "name": block.name, "input": block.input}
+    raise ValueError(f"LLM response contains no tool call (stop_reason={message.stop_reason})")
+
 
 class LLMOrchestrator:
     """Manages Claude API calls for dataset selection and decomposition."""
@@ -31,138 +356,403 @@ class LLMOrchestrator:
         model: str = "claude-sonnet-4-20250514",
         temperature: float = 0.2,
         top_p: float = 0.4,
+        cache_path: Optional[Path] = None,
+        cache_ttl_seconds: Optional[float] = None,
+        embedding_index: Optional[EmbeddingIndex] = None,
+        unit_similarity_threshold: float = 0.95,
     ):
         self.client = anthropic.Anthropic(api_key=api_key, max_retries=5)
+        self.async_client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=5)
+        self._validator = _response_validator()
         self.model = model
         self.temperature = temperature
         self.top_p = top_p
-        self._system_prompt: Optional[str] = None
-        self._selection_template: Optional[str] = None
+        # Persistent response cache; None disables caching
+        self.cache: Optional[LLMResponseCache] = (
+            LLMResponseCache(cache_path, cache_ttl_seconds)
+            if cache_path is not None else None
+        )
+        # Semantic unit-conversion cache; needs the embedding model for contexts
+        self.embedding_index = embedding_index
+        self.unit_cache: Optional[UnitConversionCache] = None
+        if cache_path is not None and embedding_index is not None:
+            self.unit_cache = UnitConversionCache(
+                cache_path, unit_similarity_threshold, cache_ttl_seconds
+            )
+        # Per-instance memo of (reference_unit, dataset_unit, product_context,
+        # TTL period); a new period starts every cache_ttl_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._convert_unit_memo = functools.lru_cache(maxsize=UNIT_CONVERSION_MEMO_SIZE)(
+            self._convert_unit
+        )
+
+    def close(self):
+        """Close the cache databases and the sync HTTP client."""
+        if self.cache is not None:
+            self.cache.close()
+        if self.unit_cache is not None:
+            self.unit_cache.close()
+        self.client.close()
+
+    async def aclose(self):
+        """close() plus the async HTTP client; run it on the event loop the
+        async client was used from."""
+        self.close()
+        await self.async_client.close()
+
+    def _cache_key(self, **kwargs) -> str:
+        """Hash of a messages.create request, including model and sampling params."""
+        return make_cache_key(
+            model=self.model,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            system=_SYSTEM_BLOCKS,
+            **kwargs,
+        )
 
-    @property
-    def system_prompt(self) -> str:
-        if self._system_prompt is None:
-            self._system_prompt = (PROMPTS_DIR / "system_prompt.txt").read_text()
-        return self._system_prompt
+    def _cached_create(self, prompt_hash: str, **kwargs) -> dict:
+        """Call messages.create and return the tool call Claude answered with.
 
-    @property
-    def selection_template(self) -> str:
-        if self._selection_template is None:
-            self._selection_template = (PROMPTS_DIR / "candidate_selection.txt").read_text()
-        return self._selection_template
+        Tool calls are looked up in / stored to the persistent cache under
+        prompt_hash (see _cache_key), so identical requests skip the API.
+        Transient 5xx errors are retried by the client itself (max_retries).
+        """
+        if self.cache is not None:
+            cached = self.cache.get(prompt_hash)
+            if cached is not None:
+                logger.info(f"LLM cache hit ({prompt_hash[:12]})")
+                return orjson.loads(cached)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                response = self.client.messages.create(
+                    model=self.model,
+                    temperature=self.temperature,
+                    top_p=self.top_p,
+                    system=_SYSTEM_BLOCKS,
+                    **kwargs,
+                )
+                break
+            except anthropic.RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+                logger.warning(f"Rate limited by Anthropic API; retrying in {delay}s")
+                time.sleep(delay)
+        _log_prompt_cache_usage(response)
+        tool_call = _tool_call(response)
+        self._cache_response(prompt_hash, tool_call)
+        return tool_call
+
+    async def _acached_create(self, prompt_hash: str, **kwargs) -> dict:
+        """Async counterpart of _cached_create using the AsyncAnthropic client."""
+        if self.cache is not None:
+            cached = self.cache.get(prompt_hash)
+            if cached is not None:
+                logger.info(f"LLM cache hit ({prompt_hash[:12]})")
+                return orjson.loads(cached)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                response = await self.async_client.messages.create(
+                    model=self.model,
+                    temperature=self.temperature,
+                    top_p=self.top_p,
+                    system=_SYSTEM_BLOCKS,
+                    **kwargs,
+                )
+                break
+            except anthropic.RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+                logger.warning(f"Rate limited by Anthropic API; retrying in {delay}s")
+                await asyncio.sleep(delay)
+        _log_prompt_cache_usage(response)
+        tool_call = _tool_call(response)
+        self._cache_response(prompt_hash, tool_call)
+        return tool_call
+
+    def _cache_response(self, prompt_hash: str, tool_call: dict):
+        if self.cache is not None:
+            self.cache.put(prompt_hash, orjson.dumps(tool_call).decode())
+
+    def _cached_result(self, result_key: str) -> Optional[dict]:
+        """Parsed, validated result stored for result_key, if any."""
+        if self.cache is None:
+            return None
+        return self.cache.get_result(result_key)
+
+    def _store_result(self, result_key: str, result: dict):
+        if self.cache is not None:
+            self.cache.put_result(result_key, result)
+
+    def _discard_cached(self, prompt_hash: str):
+        """Forget a cached response that failed parsing or validation."""
+        if self.cache is not None:
+            self.cache.discard(prompt_hash)
 
     def decide(
         self,
         input_row: dict,
         candidates: list[CandidateResult],
-        max_retries: int = 3,
         allow_decompose: bool = True,
+        max_retries: int = 2,
     ) -> LLMDecision:
         """Ask Claude to select the best candidate or propose decomposition.
 
+        Claude answers with a tool call (see _SELECTION_TOOLS), so the
+        response is structured by construction. A tool call that fails the
+        remaining checks (e.g. a UUID not in the candidate list) is answered
+        with an error tool_result and Claude is asked again.
+
         Args:
             input_row: Dict with bezeichnung, produktinformationen, referenzeinheit, region_norm.
             candidates: List of CandidateResult from the retriever.
-            max_retries: Number of retries on JSON parse failure.
             allow_decompose: If False, forces LLM to choose match or ambiguous only.
+            max_retries: Number of attempts, including the first.
 
         Returns:
             LLMDecision with the decision type and relevant data.
-        """
-        # Format candidates for the prompt (emission values excluded to save tokens)
-        candidates_data = []
-        for c in candidates:
-            candidates_data.append({
-                "UUID": c.dataset.uuid,
-                "Activity Name": c.dataset.activity_name,
-                "Geography": c.dataset.geography,
-                "Product": c.dataset.product_name,
-                "Unit": c.dataset.unit,
-            })
 
-        # Modify prompt if decomposition is not allowed (for component searches)
-        if not allow_decompose:
-            user_prompt = self._build_component_prompt(
-                input_row,
-                candidates_data,
-            )
-        else:
-            user_prompt = self.selection_template.format(
-                bezeichnung=input_row.get("bezeichnung", ""),
-                produktinformationen=input_row.get("produktinformationen", ""),
-                referenzeinheit=input_row.get("referenzeinheit", ""),
-                region=input_row.get("region_norm", "GLO"),
-                candidates_json=json.dumps(candidates_data, indent=2, ensure_ascii=False),
-            )
+        Raises:
+            RuntimeError: If no valid tool call came back within max_retries attempts.
+        """
+        request = self._selection_request(input_row, candidates, allow_decompose)
+        # The accepted decision is cached under the initial request
+        result_key = self._cache_key(**request)
+        cached = self._cached_result(result_key)
+        if cached is not None:
+            return LLMDecision.model_validate(cached)
 
-        last_error = None
         for attempt in range(max_retries):
+            cache_key = self._cache_key(**request)
+            tool_call = self._cached_create(cache_key, **request)
             try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4096,
-                    temperature=self.temperature,
-                    top_p=self.top_p,
-                    system=self.system_prompt,
-                    messages=[{"role": "user", "content": user_prompt}],
-                )
-                raw_text = response.content[0].text
-                return self._parse_response(raw_text, candidates)
+                return self._accept_decision(result_key, cache_key, tool_call, candidates)
+            except (KeyError, ValueError) as e:
+                error = e
+                request = self._reask_request(request, tool_call, e, attempt, max_retries)
+        raise RuntimeError(
+            f"No valid decision from LLM after {max_retries} attempts. Last error: {error}"
+        ) from error
 
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                last_error = e
-                logger.warning(
-                    f"LLM response parse error (attempt {attempt + 1}/{max_retries}): {e}"
-                )
-                if attempt < max_retries - 1:
-                    continue
+    async def adecide(
+        self,
+        input_row: dict,
+        candidates: list[CandidateResult],
+        allow_decompose: bool = True,
+        max_retries: int = 2,
+    ) -> LLMDecision:
+        """Async variant of decide(); see there for arguments."""
+        request = self._selection_request(input_row, candidates, allow_decompose)
+        result_key = self._cache_key(**request)
+        cached = self._cached_result(result_key)
+        if cached is not None:
+            return LLMDecision.model_validate(cached)
 
+        for attempt in range(max_retries):
+            cache_key = self._cache_key(**request)
+            tool_call = await self._acached_create(cache_key, **request)
+            try:
+                return self._accept_decision(result_key, cache_key, tool_call, candidates)
+            except (KeyError, ValueError) as e:
+                error = e
+                request = self._reask_request(request, tool_call, e, attempt, max_retries)
         raise RuntimeError(
-            f"Failed to get valid JSON from LLM after {max_retries} attempts. "
-            f"Last error: {last_error}"
-        )
+            f"No valid decision from LLM after {max_retries} attempts. Last error: {error}"
+        ) from error
 
-    def _build_component_prompt(
+    def _accept_decision(
         self,
-        input_row: dict,
-        candidates_data: list[dict],
-    ) -> str:
-        """Build a prompt for component matching that ONLY allows match or ambiguous."""
-        return f"""Task: Select the best emission dataset for this component. You MUST choose either "match" or "ambiguous" - decomposition is NOT allowed for components.
+        result_key: str,
+        cache_key: str,
+        tool_call: dict,
+        candidates: list[CandidateResult],
+    ) -> LLMDecision:
+        """Parse a selection tool call and cache the decision under result_key.
 
-Input component:
-- Bezeichnung: "{input_row.get('bezeichnung', '')}"
-- Produktinformationen: "{input_row.get('produktinformationen', '')}"
-- Referenzeinheit: "{input_row.get('referenzeinheit', '')}"
-- Region: "{input_row.get('region_norm', 'GLO')}"
+        An invalid tool call is dropped from the response cache (cache_key)
+        so it is not replayed.
+        """
+        try:
+            decision = self._parse_response(tool_call, candidates)
+        except (KeyError, ValueError):
+            self._discard_cached(cache_key)
+            raise
+        self._store_result(result_key, decision.model_dump(mode="json"))
+        return decision
+
+    @staticmethod
+    def _reask_request(
+        request: dict,
+        tool_call: dict,
+        error: Exception,
+        attempt: int,
+        max_retries: int,
+    ) -> dict:
+        """Extend a selection request with the rejected tool call and an error
+        tool_result, so Claude can correct itself on the next attempt."""
+        logger.warning(
+            f"Invalid LLM tool call (attempt {attempt + 1}/{max_retries}): {error}"
+        )
+        return {
+            **request,
+            "messages": [
+                *request["messages"],
+                {"role": "assistant", "content": [{"type": "tool_use", **tool_call}]},
+                {"role": "user", "content": [{
+                    "type": "tool_result",
+                    "tool_use_id": tool_call["id"],
+                    "is_error": True,
+                    "content": (
+                        f"Invalid answer: {error}. Use only UUIDs copied exactly "
+                        f"from the candidate list and call one of the tools again."
+                    ),
+                }]},
+            ],
+        }
+
+    async def decide_many(
+        self,
+        rows_and_candidates: list[tuple[dict, list[CandidateResult]]],
+        concurrency: int = 32,
+        allow_decompose: bool = True,
+    ) -> list[LLMDecision | BaseException]:
+        """Run adecide() for many rows concurrently.
 
-Candidates (each is a row from the ecoinvent database - do not modify any strings):
-{json.dumps(candidates_data, indent=2, ensure_ascii=False)}
+        At most `concurrency` requests are in flight at once. Results are
+        returned in input order; a row whose call failed gets its exception
+        in place of a decision so one bad row doesn't sink the batch.
 
-Rules:
-- Prefer cradle-to-gate production processes.
-- Prefer region order: requested region > GLO > RoW.
-- Prefer unit match to Referenzeinheit.
-- If ONE candidate is clearly the best match, choose "match" and return its UUID.
-- If multiple candidates are plausible, choose "ambiguous" and return a ranked list of up to 10 options.
-- IMPORTANT: Decomposition is NOT ALLOWED. You must pick from the provided candidates.
+        Sync callers use asyncio.run(llm.decide_many(...)).
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(input_row: dict, candidates: list[CandidateResult]) -> LLMDecision:
+            async with semaphore:
+                return await self.adecide(
+                    input_row, candidates, allow_decompose=allow_decompose
+                )
+
+        return await asyncio.gather(
+            *(_one(row, cands) for row, cands in rows_and_candidates),
+            return_exceptions=True,
+        )
+
+    def decide_batch(
+        self,
+        rows: list[tuple[dict, list[CandidateResult]]],
+        poll_interval: float = 30.0,
+    ) -> list[LLMDecision | BaseException]:
+        """Decide many rows through the Message Batches API (50% cheaper).
+
+        Rows already in the result cache are answered locally; the rest are
+        submitted as one batch, polled until it has ended, and parsed per
+        result (custom_id = position in `rows`). A row whose batch result
+        errored, expired or failed to parse is retried through the regular
+        decide() path. Results are returned in input order, with the
+        exception in place of a decision for rows that still failed.
+
+        Batches can take minutes to hours; interactive single-row callers
+        should use decide().
+        """
+        results: list[Optional[LLMDecision | BaseException]] = [None] * len(rows)
+        requests = []
+        cache_keys: dict[str, str] = {}
+        for i, (input_row, candidates) in enumerate(rows):
+            request = self._selection_request(input_row, candidates, allow_decompose=True)
+            cache_key = self._cache_key(**request)
+            cached = self._cached_result(cache_key)
+            if cached is not None:
+                results[i] = LLMDecision.model_validate(cached)
+                continue
+            custom_id = str(i)
+            cache_keys[custom_id] = cache_key
+            requests.append({
+                "custom_id": custom_id,
+                "params": {
+                    "model": self.model,
+                    "temperature": self.temperature,
+                    "top_p": self.top_p,
+                    "system": _SYSTEM_BLOCKS,
+                    **request,
+                },
+            })
+
+        if requests:
+            batch = self.client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted message batch {batch.id} with {len(requests)} requests")
+            while batch.processing_status != "ended":
+                time.sleep(poll_interval)
+                batch = self.client.messages.batches.retrieve(batch.id)
+            logger.info(f"Message batch {batch.id} ended: {batch.request_counts}")
+
+            for entry in self.client.messages.batches.results(batch.id):
+                i = int(entry.custom_id)
+                if entry.result.type != "succeeded":
+                    logger.warning(f"Batch request {i} {entry.result.type}; retrying directly")
+                    continue
+                try:
+                    tool_call = _tool_call(entry.result.message)
+                    decision = self._parse_response(tool_call, rows[i][1])
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Batch response {i} invalid: {e}; retrying directly")
+                    continue
+                cache_key = cache_keys[entry.custom_id]
+                self._cache_response(cache_key, tool_call)
+                self._store_result(cache_key, decision.model_dump(mode="json"))
+                results[i] = decision
+
+        for i, (input_row, candidates) in enumerate(rows):
+            if results[i] is None:
+                try:
+                    results[i] = self.decide(input_row, candidates)
+                except Exception as e:
+                    results[i] = e
+        return results
+
+    def _selection_request(
+        self,
+        input_row: dict,
+        candidates: list[CandidateResult],
+        allow_decompose: bool,
+    ) -> dict:
+        """Build the messages.create arguments (besides model, sampling
+        params and system prompt) for a candidate-selection request."""
+        # Modify prompt if decomposition is not allowed (for component searches)
+        if not allow_decompose:
+            rules = _COMPONENT_RULES
+            tools = _COMPONENT_TOOLS
+            user_prompt = self._build_component_prompt(input_row, candidates)
+        else:
+            rules = SELECTION_RULES
+            tools = _SELECTION_TOOLS
+            user_prompt = SELECTION_TEMPLATE.format_map(
+                _SELECTION_DEFAULTS
+                | input_row
+                | {"candidates_json": _dumps_candidates(candidates)}
+            )
 
-You MUST respond with ONLY this JSON structure (no other text):
+        return {
+            "max_tokens": 4096,
+            "messages": [_user_message(rules, user_prompt)],
+            **tools,
+        }
 
-{{
-  "decision": "match" | "ambiguous",
-  "match": {{
-    "UUID": "exact-uuid-from-candidates"
-  }},
-  "ambiguous": {{
-    "options": [
-      {{"UUID": "...", "why_short": "short reason this candidate is plausible"}},
-      ...
-    ]
-  }}
-}}
+    def _build_component_prompt(
+        self,
+        input_row: dict,
+        candidates: list[CandidateResult],
+    ) -> str:
+        """Build the per-request part of a component prompt (see _COMPONENT_RULES).
 
-Include ONLY the relevant section based on your decision."""
+        Candidates go in as compact JSON; indentation only costs tokens.
+        """
+        candidates_json = orjson.dumps([c.prompt_payload for c in candidates]).decode()
+        return _COMPONENT_TEMPLATE.format_map(
+            _SELECTION_DEFAULTS | input_row | {"candidates_json": candidates_json}
+        )
 
     def request_decomposition(
         self,
@@ -173,11 +763,11 @@ Include ONLY the relevant section based on your decision."""
         """Request decomposition when unit doesn't match or no candidates found.
 
         This sends a targeted prompt asking only for decomposition, not selection.
+        If the component quantities don't sum to 1.0, Claude is told so and
+        asked again, up to max_retries times in total.
         """
         ref_unit = input_row.get('referenzeinheit', '')
-        prompt = f"""Decompose this product into physical components for emission factor calculation.
-
-Product:
+        prompt = f"""Product:
 - Bezeichnung: "{input_row.get('bezeichnung', '')}"
 - Produktinformationen: "{input_row.get('produktinformationen', '')}"
 - Referenzeinheit: "{ref_unit}"
@@ -190,149 +780,104 @@ MANDATORY CONSTRAINT: The sum of ALL component quantities MUST = 1.0 {ref_unit}
 ====================================================================
 
 You are decomposing exactly 1 {ref_unit} of this product.
-Each component is a FRACTION of that 1 {ref_unit}.
-The fractions MUST add up to EXACTLY 1.0.
-
-EXAMPLE: Decomposing 1 kg Hamburger:
-  beef patty:  0.35 kg
-  wheat bun:   0.25 kg
-  cheese:      0.15 kg
-  lettuce:     0.08 kg
-  tomato:      0.07 kg
-  onion:       0.05 kg
-  condiments:  0.05 kg
-  ─────────────────────
-  TOTAL:       1.00 kg  <-- MUST equal 1.0
-
-WRONG (DO NOT DO THIS):
-  beef: 0.10 kg, bun: 0.08 kg, cheese: 0.02 kg = 0.20 kg TOTAL
-  This is WRONG because 0.20 ≠ 1.0 kg!
-
-Rules:
-- 3-10 physical components
-- All components should use "{ref_unit}" as unit where possible
-- Use English search queries for each component (for ecoinvent database)
-- component_label should be descriptive (e.g., "beef patty", "wheat bun", NOT generic "materials")
+All components should use "{ref_unit}" as unit where possible.
 
-BEFORE writing the JSON, mentally add up all quantities and verify the sum is 1.0 {ref_unit}.
+BEFORE calling the decompose tool, mentally add up all quantities and verify the sum is 1.0 {ref_unit}."""
 
-Respond with ONLY this JSON:
-
-{{
-  "decision": "decompose",
-  "decompose": {{
-    "assumptions": ["list all assumptions about composition, weights, etc."],
-    "components": [
-      {{
-        "component_label": "descriptive name",
-        "assumed_quantity": 0.35,
-        "assumed_unit": "{ref_unit}",
-        "search_query_text": "English search query for ecoinvent database"
-      }}
-    ]
-  }}
-}}"""
-
-        messages = [{"role": "user", "content": prompt}]
-        last_error = None
+        user_message = _user_message(_DECOMPOSITION_RULES, prompt)
+        messages = [user_message]
+        # The accepted decomposition is cached under the initial request
+        result_key = self._cache_key(
+            max_tokens=4096, messages=messages, **_DECOMPOSITION_TOOLS
+        )
+        cached = self._cached_result(result_key)
+        if cached is not None:
+            return LLMDecision.model_validate(cached)
 
         for attempt in range(max_retries):
+            request = {"max_tokens": 4096, "messages": messages, **_DECOMPOSITION_TOOLS}
+            cache_key = self._cache_key(**request)
+            tool_call = self._cached_create(cache_key, **request)
             try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4096,
-                    temperature=self.temperature,
-                    top_p=self.top_p,
-                    system=self.system_prompt,
-                    messages=messages,
-                )
-                raw_text = response.content[0].text
-                decision = self._parse_response(raw_text, candidates=[])
-
-                # Validate decomposition sum
-                if decision.components:
-                    total = sum(c.assumed_quantity for c in decision.components)
-                    if not (0.95 <= total <= 1.05):
-                        logger.warning(
-                            f"Decomposition sum {total:.3f} != 1.0 {ref_unit} "
-                            f"(attempt {attempt + 1}/{max_retries}). Retrying..."
-                        )
-                        # Add correction feedback and retry
-                        comp_list = ", ".join(
-                            f"{c.component_label}: {c.assumed_quantity}"
-                            for c in decision.components
-                        )
-                        messages = [
-                            {"role": "user", "content": prompt},
-                            {"role": "assistant", "content": raw_text},
-                            {"role": "user", "content": (
-                                f"WRONG! Your components sum to {total:.3f} {ref_unit}, "
-                                f"but MUST sum to exactly 1.0 {ref_unit}. "
-                                f"Components: {comp_list}. "
-                                f"Please recalculate with quantities that sum to 1.0 {ref_unit}. "
-                                f"Return the corrected JSON only."
-                            )},
-                        ]
-                        if attempt < max_retries - 1:
-                            continue
-                        # Last attempt still wrong - raise
-                        raise ValueError(
-                            f"Decomposition sum {total:.3f} != 1.0 after {max_retries} attempts"
-                        )
-
+                decision = self._parse_response(tool_call, candidates=[])
+            except (KeyError, ValueError):
+                self._discard_cached(cache_key)
+                raise
+
+            # Validate decomposition sum
+            components = decision.components
+            quantities = np.fromiter(
+                (c.assumed_quantity for c in components),
+                dtype=np.float64,
+                count=len(components),
+            )
+            total = float(quantities.sum())
+            if not components or np.isclose(total, 1.0, atol=0.05):
+                self._store_result(result_key, decision.model_dump(mode="json"))
                 return decision
 
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                last_error = e
-                logger.warning(
-                    f"Decomposition parse error (attempt {attempt + 1}/{max_retries}): {e}"
-                )
-                if attempt < max_retries - 1:
-                    continue
-
-        raise RuntimeError(
-            f"Failed to get decomposition from LLM after {max_retries} attempts. "
-            f"Last error: {last_error}"
+            self._discard_cached(cache_key)
+            logger.warning(
+                f"Decomposition sum {total:.3f} != 1.0 {ref_unit} "
+                f"(attempt {attempt + 1}/{max_retries}). Retrying..."
+            )
+            # Answer the tool call with correction feedback and retry
+            comp_list = ", ".join([
+                f"{c.component_label}: {c.assumed_quantity}"
+                for c in components
+            ])
+            messages = [
+                user_message,
+                {"role": "assistant", "content": [{"type": "tool_use", **tool_call}]},
+                {"role": "user", "content": [{
+                    "type": "tool_result",
+                    "tool_use_id": tool_call["id"],
+                    "is_error": True,
+                    "content": (
+                        f"WRONG! Your components sum to {total:.3f} {ref_unit}, "
+                        f"but MUST sum to exactly 1.0 {ref_unit}. "
+                        f"Components: {comp_list}. "
+                        f"Please recalculate with quantities that sum to 1.0 {ref_unit} "
+                        f"and call decompose again."
+                    ),
+                }]},
+            ]
+
+        raise ValueError(
+            f"Decomposition sum {total:.3f} != 1.0 after {max_retries} attempts"
         )
 
     def _parse_response(
         self,
-        raw_text: str,
+        tool_call: dict,
         candidates: list[CandidateResult],
     ) -> LLMDecision:
-        """Parse strict JSON response into LLMDecision."""
-        # Strip markdown code fences if present
-        text = raw_text.strip()
-        if text.startswith("```"):
-            # Remove first line (```json) and last line (```)
-            lines = text.split("\n")
-            text = "\n".join(lines[1:-1])
-
-        data = json.loads(text)
-        decision = data["decision"]
+        """Validate a decision tool call and turn it into an LLMDecision."""
+        decision = _TOOL_DECISIONS.get(tool_call["name"])
+        if decision is None:
+            raise ValueError(f"LLM called unknown tool: {tool_call['name']}")
+        data = self._validator({"decision": decision, decision: tool_call["input"]})
 
-        # Build a set of valid UUIDs from candidates for validation
-        valid_uuids = {c.dataset.uuid for c in candidates}
+        # Candidates by UUID, for validation and ambiguous-option lookup
+        by_uuid = {c.dataset.uuid: c for c in candidates}
 
         if decision == "match":
-            match_data = data.get("match", {})
-            uuid = match_data.get("UUID", "")
-            if valid_uuids and uuid not in valid_uuids:
+            uuid = data["match"]["UUID"]
+            if by_uuid and uuid not in by_uuid:
                 raise ValueError(
                     f"LLM returned UUID not in candidate list: {uuid}"
                 )
             return LLMDecision(type=DecisionType.MATCH, selected_uuid=uuid)
 
         elif decision == "ambiguous":
-            amb_data = data.get("ambiguous", {})
             options = []
-            for i, opt in enumerate(amb_data.get("options", [])):
-                uuid = opt.get("UUID", "")
-                if valid_uuids and uuid not in valid_uuids:
+            for i, opt in enumerate(data["ambiguous"]["options"]):
+                uuid = opt["UUID"]
+                if by_uuid and uuid not in by_uuid:
                     logger.warning(f"Skipping ambiguous UUID not in candidates: {uuid}")
                     continue
                 # Look up full info from candidates
-                candidate = next((c for c in candidates if c.dataset.uuid == uuid), None)
+                candidate = by_uuid.get(uuid)
                 options.append(
                     AmbiguousCandidate(
                         uuid=uuid,
@@ -340,40 +885,34 @@ Respond with ONLY this JSON:
                         product_name=candidate.dataset.product_name if candidate else opt.get("Reference Product Name", ""),
                         geography=candidate.dataset.geography if candidate else opt.get("Geography", ""),
                         unit=candidate.dataset.unit if candidate else opt.get("Unit", ""),
-                        why_short=opt.get("why_short", ""),
+                        why_short=opt["why_short"],
                         rank=i + 1,
                     )
                 )
             return LLMDecision(type=DecisionType.AMBIGUOUS, candidates=options)
 
-        elif decision == "decompose":
-            decomp_data = data.get("decompose", {})
-            assumptions = decomp_data.get("assumptions", [])
-            components = []
-            for comp in decomp_data.get("components", []):
-                components.append(
-                    DecompComponent(
-                        component_label=comp["component_label"],
-                        assumed_quantity=float(comp["assumed_quantity"]),
-                        assumed_unit=comp["assumed_unit"],
-                        search_query_text=comp["search_query_text"],
-                    )
-                )
-            return LLMDecision(
-                type=DecisionType.DECOMPOSE,
-                components=components,
-                assumptions=assumptions,
+        # decompose; the schema admits no other decision types
+        decomp_data = data["decompose"]
+        components = [
+            DecompComponent(
+                component_label=comp["component_label"],
+                assumed_quantity=float(comp["assumed_quantity"]),
+                assumed_unit=comp["assumed_unit"],
+                search_query_text=comp["search_query_text"],
             )
-
-        else:
-            raise ValueError(f"Unknown decision type: {decision}")
+            for comp in decomp_data["components"]
+        ]
+        return LLMDecision(
+            type=DecisionType.DECOMPOSE,
+            components=components,
+            assumptions=decomp_data["assumptions"],
+        )
 
     def convert_unit(
         self,
         reference_unit: str,
         dataset_unit: str,
         product_context: str,
-        max_retries: int = 3,
     ) -> dict:
         """Ask Claude to convert between units using domain knowledge.
 
@@ -381,74 +920,91 @@ Respond with ONLY this JSON:
             reference_unit: The target unit (Referenzeinheit).
             dataset_unit: The unit of the matched dataset.
             product_context: Description of the product for context.
-            max_retries: Number of retries on parse failure.
 
         Returns:
             Dict with keys:
             - conversion_factor: float (how many dataset_units per 1 reference_unit)
             - explanation: str (explanation of the conversion)
+
+        Pairs in _CONTEXT_FREE_UNIT_PAIRS (e.g. kWh -> MJ) are converted
+        without product context, so every row shares one answer. Repeats
+        within the process are served from an in-memory LRU memo (within
+        cache_ttl_seconds when a TTL is set); beyond
+        that, conversions for the same unit pair and a near-identical
+        product context (cosine similarity >= the configured threshold) are
+        served from the semantic unit cache when it is enabled.
         """
-        prompt = f"""You are a unit conversion expert. Convert between the following units:
+        ref_key = (map_unit(reference_unit) or reference_unit).strip().lower()
+        dataset_key = dataset_unit.strip().lower()
+        if (ref_key, dataset_key) in _CONTEXT_FREE_UNIT_PAIRS:
+            reference_unit = map_unit(reference_unit) or reference_unit.strip()
+            product_context = ""
+        ttl_epoch = (
+            int(time.time() // self.cache_ttl_seconds) if self.cache_ttl_seconds else 0
+        )
+        return dict(self._convert_unit_memo(
+            reference_unit, dataset_unit, product_context, ttl_epoch
+        ))
+
+    def _convert_unit(
+        self,
+        reference_unit: str,
+        dataset_unit: str,
+        product_context: str,
+        ttl_epoch: int = 0,
+    ) -> dict:
+        """convert_unit() without the memo; an empty product_context asks
+        for the generic conversion. ttl_epoch only keys the memo, so memoized
+        conversions expire no later than the persistent caches' entries."""
+        # Exact repeats of (units, context) are common across rows
+        result_key = make_cache_key(
+            task="convert_unit",
+            model=self.model,
+            reference_unit=reference_unit,
+            dataset_unit=dataset_unit,
+            product_context=product_context,
+        )
+        cached = self._cached_result(result_key)
+        if cached is not None:
+            return cached
+
+        context_embedding = None
+        if self.unit_cache is not None and product_context:
+            context_embedding = self.embedding_index.encode_queries([product_context])[0]
+            cached = self.unit_cache.lookup(
+                reference_unit, dataset_unit,
+                self.embedding_index.model_name, context_embedding,
+            )
+            if cached is not None:
+                return cached
 
-Product context: {product_context}
+        prompt = f"""Product context: {product_context or "(any product)"}
 Reference unit (target): {reference_unit}
 Dataset unit (source): {dataset_unit}
 
-Task: Calculate how many {dataset_unit} are needed to represent exactly 1 {reference_unit} of this product.
-
-Use your knowledge about:
-- Energy content (e.g., 1 liter diesel ≈ 36 MJ)
-- Weight conversions
-- Volume conversions
-- Any other relevant physical properties
-
-Respond with ONLY this JSON (no other text):
-
-{{
-  "conversion_factor": <number>,
-  "explanation": "Brief explanation of how you calculated this conversion"
-}}
-
-Example for "1 liter diesel" to "MJ":
-{{
-  "conversion_factor": 36.0,
-  "explanation": "1 liter of diesel contains approximately 36 MJ of energy (lower heating value)"
-}}"""
-
-        last_error = None
-        for attempt in range(max_retries):
-            try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1024,
-                    temperature=self.temperature,
-                    top_p=self.top_p,
-                    system=self.system_prompt,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                raw_text = response.content[0].text
-
-                # Strip markdown code fences if present
-                text = raw_text.strip()
-                if text.startswith("```"):
-                    lines = text.split("\n")
-                    text = "\n".join(lines[1:-1])
-
-                data = json.loads(text)
-                return {
-                    "conversion_factor": float(data["conversion_factor"]),
-                    "explanation": data["explanation"],
-                }
-
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                last_error = e
-                logger.warning(
-                    f"Unit conversion parse error (attempt {attempt + 1}/{max_retries}): {e}"
-                )
-                if attempt < max_retries - 1:
-                    continue
-
-        raise RuntimeError(
-            f"Failed to get unit conversion from LLM after {max_retries} attempts. "
-            f"Last error: {last_error}"
-        )
+Task: Calculate how many {dataset_unit} are needed to represent exactly 1 {reference_unit} of this product."""
+
+        request = {
+            "max_tokens": 1024,
+            "messages": [_user_message(_UNIT_CONVERSION_RULES, prompt)],
+            **_UNIT_CONVERSION_TOOLS,
+        }
+        cache_key = self._cache_key(**request)
+        tool_call = self._cached_create(cache_key, **request)
+        try:
+            conversion = {
+                "conversion_factor": float(tool_call["input"]["conversion_factor"]),
+                "explanation": tool_call["input"]["explanation"],
+            }
+        except (KeyError, TypeError, ValueError):
+            self._discard_cached(cache_key)
+            raise
+
+        if context_embedding is not None:
+            self.unit_cache.add(
+                reference_unit, dataset_unit,
+                self.embedding_index.model_name,
+                product_context, context_embedding, conversion,
+            )
+        self._store_result(result_key, conversion)
+        return conversion
@@ -1,12 +1,97 @@
 """Build output strings: Beschreibung, Quelle, Detailed calculation."""
 from __future__ import annotations
 
+import re
+
 from app.models import CalcResult, DecompCalcResult, OutputTooLongError
 from app.services.calculator import format_number
 
 # Increased from 500 to 1000 to support up to 10 components
 MAX_CHARS = 1000
 
+_WS_RE = re.compile(r"\s+")
+
+# Detailed-calculation scaffolds, filled with str.format_map
+_INPUT_SECTION = "\n".join([
+    "Input: {bezeichnung}",
+    "Produktinformationen: {produktinformationen}",
+    "Referenzeinheit: {referenzeinheit}",
+    "Region: {region}",
+])
+
+_MATCH_HEADER = "\n".join([
+    "=== Detailed Calculation ===",
+    "",
+    _INPUT_SECTION,
+    "",
+    "--- Matched Dataset ---",
+    "UUID: {uuid}",
+    "Activity: {activity_name}",
+    "Geography: {geography}",
+    "Unit: {unit}",
+    "Quantity: {quantity}",
+])
+
+_UNIT_CONVERSION_SECTION = "\n".join([
+    "",
+    "--- Unit Conversion ---",
+    "Reference unit: {referenzeinheit}",
+    "Dataset unit: {unit}",
+    "Conversion factor: {conversion_factor}",
+    "Explanation: {explanation}",
+])
+
+_MATCH_CALCULATION = "\n".join([
+    "",
+    "--- Calculation ---",
+    "Biogenic [kg CO2-Eq]: {biogenic_kg}",
+    "  = DB value × {quantity} = {biogenic_kg} kg",
+    "  = {biogenic_kg} / 1000 = {biogenic_t} t CO2-Eq",
+    "  Formatted: {biogenic_t_fmt} t CO2-Eq",
+    "",
+    "Total excl. biogenic [kg CO2-Eq]: {total_kg}",
+    "  = DB value × {quantity} = {total_kg} kg",
+    "  = {total_kg} / 1000 = {total_t} t CO2-Eq",
+    "  Formatted: {total_t_fmt} t CO2-Eq",
+])
+
+_MATCH_TEMPLATE = "\n".join([_MATCH_HEADER, _MATCH_CALCULATION])
+_MATCH_TEMPLATE_WITH_CONVERSION = "\n".join(
+    [_MATCH_HEADER, _UNIT_CONVERSION_SECTION, _MATCH_CALCULATION]
+)
+
+# {assumptions} and {components} are pre-rendered blocks, each line
+# carrying its own leading newline.
+_DECOMP_TEMPLATE = "\n".join([
+    "=== Detailed Calculation (Decomposition) ===",
+    "",
+    _INPUT_SECTION,
+    "",
+    "--- Assumptions ---{assumptions}",
+    "",
+    "--- Components ---{components}",
+    "",
+    "--- Totals ---",
+    "Sum biogenic [kg]: {biogenic_kg_sum}",
+    "Sum total excl. biogenic [kg]: {total_kg_sum}",
+    "",
+    "Biogenic [t CO2-Eq]: {biogenic_kg_sum} / 1000 = {biogenic_t}",
+    "  Formatted: {biogenic_t_fmt}",
+    "Total excl. biogenic [t CO2-Eq]: {total_kg_sum} / 1000 = {total_t}",
+    "  Formatted: {total_t_fmt}",
+])
+
+_DECOMP_COMPONENT_TEMPLATE = "\n" + "\n".join([
+    "",
+    "  [{label}]",
+    "  UUID: {uuid}",
+    "  Activity: {activity}",
+    "  Geography: {geography}",
+    "  Quantity: {quantity} {unit}",
+    "  Biogenic: {biogenic_kg} kg CO2-Eq",
+    "  Total excl. biogenic: {total_kg} kg CO2-Eq",
+])
+
 
 def build_beschreibung_match(
     input_row: dict,
@@ -33,7 +118,7 @@ def build_beschreibung_match(
         f"{conversion_note}"
     )
     # Clean up double spaces
-    desc = " ".join(desc.split())
+    desc = _WS_RE.sub(" ", desc).strip()
     return desc
 
 
@@ -52,7 +137,7 @@ def build_beschreibung_decomp(
 
     components_str = " + ".join(parts)
     desc = f"1 {input_row.get('referenzeinheit', '')} = Zerlegung: {components_str}"
-    desc = " ".join(desc.split())
+    desc = _WS_RE.sub(" ", desc).strip()
     return desc
 
 
@@ -78,53 +163,41 @@ def build_quelle(uuids: list[str]) -> str:
     return quelle
 
 
+def _input_fields(input_row: dict) -> dict:
+    """Input-row values shared by the detailed-calculation templates."""
+    return {
+        "bezeichnung": input_row.get("bezeichnung", ""),
+        "produktinformationen": input_row.get("produktinformationen", ""),
+        "referenzeinheit": input_row.get("referenzeinheit", ""),
+        "region": input_row.get("region_norm", "GLO"),
+    }
+
+
 def build_detailed_calculation_match(
     input_row: dict,
     calc: CalcResult,
 ) -> str:
     """Build full detailed calculation string for a match. No char limit."""
-    lines = [
-        "=== Detailed Calculation ===",
-        "",
-        f"Input: {input_row.get('bezeichnung', '')}",
-        f"Produktinformationen: {input_row.get('produktinformationen', '')}",
-        f"Referenzeinheit: {input_row.get('referenzeinheit', '')}",
-        f"Region: {input_row.get('region_norm', 'GLO')}",
-        "",
-        "--- Matched Dataset ---",
-        f"UUID: {calc.uuid}",
-        f"Activity: {calc.activity_name}",
-        f"Geography: {calc.geography}",
-        f"Unit: {calc.unit}",
-        f"Quantity: {calc.quantity}",
-    ]
+    fields = _input_fields(input_row) | {
+        "uuid": calc.uuid,
+        "activity_name": calc.activity_name,
+        "geography": calc.geography,
+        "unit": calc.unit,
+        "quantity": calc.quantity,
+        "biogenic_kg": calc.biogenic_kg,
+        "biogenic_t": calc.biogenic_t,
+        "biogenic_t_fmt": format_number(calc.biogenic_t),
+        "total_kg": calc.total_excl_bio_kg,
+        "total_t": calc.total_excl_bio_t,
+        "total_t_fmt": format_number(calc.total_excl_bio_t),
+    }
 
     # Add unit conversion explanation if present
     if calc.unit_conversion:
-        lines.extend([
-            "",
-            "--- Unit Conversion ---",
-            f"Reference unit: {input_row.get('referenzeinheit', '')}",
-            f"Dataset unit: {calc.unit}",
-            f"Conversion factor: {calc.unit_conversion['conversion_factor']}",
-            f"Explanation: {calc.unit_conversion['explanation']}",
-        ])
-
-    lines.extend([
-        "",
-        "--- Calculation ---",
-        f"Biogenic [kg CO2-Eq]: {calc.biogenic_kg}",
-        f"  = DB value × {calc.quantity} = {calc.biogenic_kg} kg",
-        f"  = {calc.biogenic_kg} / 1000 = {calc.biogenic_t} t CO2-Eq",
-        f"  Formatted: {format_number(calc.biogenic_t)} t CO2-Eq",
-        "",
-        f"Total excl. biogenic [kg CO2-Eq]: {calc.total_excl_bio_kg}",
-        f"  = DB value × {calc.quantity} = {calc.total_excl_bio_kg} kg",
-        f"  = {calc.total_excl_bio_kg} / 1000 = {calc.total_excl_bio_t} t CO2-Eq",
-        f"  Formatted: {format_number(calc.total_excl_bio_t)} t CO2-Eq",
-    ])
-
-    return "\n".join(lines)
+        fields["conversion_factor"] = calc.unit_conversion["conversion_factor"]
+        fields["explanation"] = calc.unit_conversion["explanation"]
+        return _MATCH_TEMPLATE_WITH_CONVERSION.format_map(fields)
+    return _MATCH_TEMPLATE.format_map(fields)
 
 
 def build_detailed_calculation_decomp(
@@ -132,50 +205,30 @@ def build_detailed_calculation_decomp(
     decomp: DecompCalcResult,
 ) -> str:
     """Build full detailed calculation string for a decomposition. No char limit."""
-    lines = [
-        "=== Detailed Calculation (Decomposition) ===",
-        "",
-        f"Input: {input_row.get('bezeichnung', '')}",
-        f"Produktinformationen: {input_row.get('produktinformationen', '')}",
-        f"Referenzeinheit: {input_row.get('referenzeinheit', '')}",
-        f"Region: {input_row.get('region_norm', 'GLO')}",
-        "",
-        "--- Assumptions ---",
-    ]
-
-    for assumption in decomp.assumptions:
-        lines.append(f"  - {assumption}")
-
-    lines.extend([
-        "",
-        "--- Components ---",
-    ])
-
-    for comp in decomp.components:
-        lines.extend([
-            f"",
-            f"  [{comp.component_label}]",
-            f"  UUID: {comp.matched_uuid}",
-            f"  Activity: {comp.matched_activity}",
-            f"  Geography: {comp.matched_geography}",
-            f"  Quantity: {comp.assumed_quantity} {comp.assumed_unit}",
-            f"  Biogenic: {comp.scaled_biogenic_kg} kg CO2-Eq",
-            f"  Total excl. biogenic: {comp.scaled_total_kg} kg CO2-Eq",
-        ])
-
-    lines.extend([
-        "",
-        "--- Totals ---",
-        f"Sum biogenic [kg]: {decomp.biogenic_kg_sum}",
-        f"Sum total excl. biogenic [kg]: {decomp.total_excl_bio_kg_sum}",
-        f"",
-        f"Biogenic [t CO2-Eq]: {decomp.biogenic_kg_sum} / 1000 = {decomp.biogenic_t}",
-        f"  Formatted: {format_number(decomp.biogenic_t)}",
-        f"Total excl. biogenic [t CO2-Eq]: {decomp.total_excl_bio_kg_sum} / 1000 = {decomp.total_excl_bio_t}",
-        f"  Formatted: {format_number(decomp.total_excl_bio_t)}",
-    ])
-
-    return "\n".join(lines)
+    assumptions = "".join(f"\n  - {a}" for a in decomp.assumptions)
+    components = "".join(
+        _DECOMP_COMPONENT_TEMPLATE.format_map({
+            "label": comp.component_label,
+            "uuid": comp.matched_uuid,
+            "activity": comp.matched_activity,
+            "geography": comp.matched_geography,
+            "quantity": comp.assumed_quantity,
+            "unit": comp.assumed_unit,
+            "biogenic_kg": comp.scaled_biogenic_kg,
+            "total_kg": comp.scaled_total_kg,
+        })
+        for comp in decomp.components
+    )
+    return _DECOMP_TEMPLATE.format_map(_input_fields(input_row) | {
+        "assumptions": assumptions,
+        "components": components,
+        "biogenic_kg_sum": decomp.biogenic_kg_sum,
+        "total_kg_sum": decomp.total_excl_bio_kg_sum,
+        "biogenic_t": decomp.biogenic_t,
+        "biogenic_t_fmt": format_number(decomp.biogenic_t),
+        "total_t": decomp.total_excl_bio_t,
+        "total_t_fmt": format_number(decomp.total_excl_bio_t),
+    })
 
 
 def validate_beschreibung(beschreibung: str) -> str:
@@ -3,11 +3,11 @@ from __future__ import annotations
 
 import io
 import logging
-import re
+from datetime import date, datetime, time
 from typing import Optional
 
-from openpyxl import load_workbook
-from unidecode import unidecode
+from python_calamine import CalamineWorkbook
+from unidecode import unidecode_expect_ascii
 
 from app.models import InputRowCreate
 
@@ -27,17 +27,30 @@ COLUMN_MAP = {
     "referenzjahr": "referenzjahr",
 }
 
+# InputRowCreate fields read from the template, in positional order
+FIELD_ORDER = (
+    "scope",
+    "kategorie",
+    "unterkategorie",
+    "bezeichnung",
+    "produktinformationen",
+    "referenzeinheit",
+    "region",
+    "referenzjahr",
+)
+
 
 def _normalize_text(text: str) -> str:
     """Normalize text for search: lowercase, strip, collapse whitespace."""
-    text = text.strip().lower()
-    text = re.sub(r"\s+", " ", text)
-    return text
+    return " ".join(text.lower().split())
 
 
 def _normalize_for_search(text: str) -> str:
     """Normalize for search, including transliteration of umlauts."""
-    return _normalize_text(unidecode(text))
+    # Most template text is plain ASCII; only run unidecode when needed
+    if not text.isascii():
+        text = unidecode_expect_ascii(text)
+    return _normalize_text(text)
 
 
 def _normalize_region(region: Optional[str]) -> str:
@@ -47,6 +60,23 @@ def _normalize_region(region: Optional[str]) -> str:
     return region.strip().upper()
 
 
+def _cell_text(val) -> Optional[str]:
+    """Stringify a cell value; empty cells become None.
+
+    Calamine returns every number as float, so integral values are turned
+    back into ints to keep e.g. a Referenzjahr of 2023 from becoming "2023.0".
+    Date-only cells come back as dates; they are widened to midnight datetimes
+    so they read "2023-01-01 00:00:00" as with the previous openpyxl reader.
+    """
+    if val is None or val == "":
+        return None
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    elif isinstance(val, date) and not isinstance(val, datetime):
+        val = datetime.combine(val, time())
+    return str(val).strip()
+
+
 def parse_template(file_bytes: bytes) -> list[InputRowCreate]:
     """Parse an Excel template (.xlsx) into a list of InputRowCreate objects.
 
@@ -59,17 +89,22 @@ def parse_template(file_bytes: bytes) -> list[InputRowCreate]:
     Raises:
         ValueError: If required columns are missing or no valid data rows found.
     """
-    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
-    ws = wb.active
-    if ws is None:
-        raise ValueError("Excel file has no active sheet")
+    wb = CalamineWorkbook.from_filelike(io.BytesIO(file_bytes))
+    if not wb.sheet_names:
+        raise ValueError("Excel file has no sheets")
+    # Keep leading empty rows/columns so row 1 stays the header row and
+    # column positions match the sheet
+    sheet_rows = wb.get_sheet_by_index(0).to_python(skip_empty_area=False)
+    wb.close()
+    if not sheet_rows:
+        raise ValueError("Excel file has no header row")
 
     # Find column mapping from header row
-    header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
+    header_row = sheet_rows[0]
     col_indices: dict[str, int] = {}
 
     for idx, cell_value in enumerate(header_row):
-        if cell_value is None:
+        if cell_value is None or cell_value == "":
             continue
         header_lower = str(cell_value).strip().lower()
         if header_lower in COLUMN_MAP:
@@ -84,39 +119,23 @@ def parse_template(file_bytes: bytes) -> list[InputRowCreate]:
                 f"Found headers: {[str(h).strip() for h in header_row if h]}"
             )
 
+    # Resolve the column of each field once; None for columns not present
+    idx_vec = [col_indices.get(field) for field in FIELD_ORDER]
+
     # Parse data rows
     rows: list[InputRowCreate] = []
-    for row_values in ws.iter_rows(min_row=2, values_only=True):
-        # Get cell values by mapped column index
-        def get_val(field: str) -> Optional[str]:
-            idx = col_indices.get(field)
-            if idx is None or idx >= len(row_values):
-                return None
-            val = row_values[idx]
-            if val is None:
-                return None
-            return str(val).strip()
-
-        bezeichnung = get_val("bezeichnung")
-        referenzeinheit = get_val("referenzeinheit")
+    for row_values in sheet_rows[1:]:
+        n = len(row_values)
+        vals = dict(zip(FIELD_ORDER, (
+            _cell_text(row_values[i]) if i is not None and i < n else None
+            for i in idx_vec
+        )))
 
         # Skip rows without mandatory fields
-        if not bezeichnung or not referenzeinheit:
+        if not vals["bezeichnung"] or not vals["referenzeinheit"]:
             continue
 
-        row = InputRowCreate(
-            scope=get_val("scope"),
-            kategorie=get_val("kategorie"),
-            unterkategorie=get_val("unterkategorie"),
-            bezeichnung=bezeichnung,
-            produktinformationen=get_val("produktinformationen"),
-            referenzeinheit=referenzeinheit,
-            region=get_val("region"),
-            referenzjahr=get_val("referenzjahr"),
-        )
-        rows.append(row)
-
-    wb.close()
+        rows.append(InputRowCreate(**vals))
 
     if not rows:
         raise ValueError("No valid data rows found in template (need Bezeichnung + Referenzeinheit)")
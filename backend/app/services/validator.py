@@ -2,12 +2,18 @@
 from __future__ import annotations
 
 import logging
+from typing import Optional
 
-from app.models import ValidationResult
+from app.models import DatasetRow, ValidationResult
 from app.services.dataset_store import DatasetStore
 
 logger = logging.getLogger(__name__)
 
+_MARKET_PREFIXES = ("market for", "market group")
+
+# Shared result for checks that passed
+_OK = ValidationResult(valid=True)
+
 
 class Validator:
     """Validates output data against database and business rules."""
@@ -17,7 +23,14 @@ class Validator:
 
     def validate_uuid(self, uuid: str) -> ValidationResult:
         """Check UUID exists in database."""
-        row = self.store.lookup_by_uuid(uuid)
+        return self._check_uuid(uuid, self.store.lookup_by_uuid(uuid))
+
+    def validate_activity_not_market(self, uuid: str) -> ValidationResult:
+        """Ensure the selected activity is not a market activity."""
+        return self._check_not_market(uuid, self.store.lookup_by_uuid(uuid))
+
+    @staticmethod
+    def _check_uuid(uuid: str, row: Optional[DatasetRow]) -> ValidationResult:
         if row is None:
             return ValidationResult(
                 valid=False,
@@ -25,21 +38,19 @@ class Validator:
             )
         return ValidationResult(valid=True, data=row)
 
-    def validate_activity_not_market(self, uuid: str) -> ValidationResult:
-        """Ensure the selected activity is not a market activity."""
-        row = self.store.lookup_by_uuid(uuid)
+    @staticmethod
+    def _check_not_market(uuid: str, row: Optional[DatasetRow]) -> ValidationResult:
         if row is None:
             return ValidationResult(
                 valid=False,
                 error=f"UUID not found: {uuid}",
             )
-        lower = row.activity_name.strip().lower()
-        if lower.startswith("market for") or lower.startswith("market group"):
+        if row.activity_name_lower.startswith(_MARKET_PREFIXES):
             return ValidationResult(
                 valid=False,
                 error=f"Market activity selected: '{row.activity_name}'. Market activities are excluded.",
             )
-        return ValidationResult(valid=True)
+        return _OK
 
     def validate_char_limit(
         self, field_name: str, value: str, max_chars: int = 500
@@ -53,18 +64,18 @@ class Validator:
                     f"{len(value)} chars. This is a blocking error."
                 ),
             )
-        return ValidationResult(valid=True)
+        return _OK
 
     def validate_decimal_format(self, value: str) -> ValidationResult:
         """Verify comma-decimal format (no dots as decimal separator)."""
         # Allow dots only in the integer part (thousand separators would use dots)
         # But our format doesn't use thousand separators, so dots shouldn't appear
-        if "." in value:
+        if value.find(".") != -1:
             return ValidationResult(
                 valid=False,
                 error=f"Value contains dot instead of comma: '{value}'",
             )
-        return ValidationResult(valid=True)
+        return _OK
 
     def validate_result(
         self,
@@ -80,10 +91,12 @@ class Validator:
         """
         results = []
 
-        # Validate each UUID
+        # Validate each UUID, fetching all of them in one query
+        rows = self.store.lookup_by_uuids(uuids)
         for uuid in uuids:
-            results.append(self.validate_uuid(uuid))
-            results.append(self.validate_activity_not_market(uuid))
+            row = rows.get(uuid)
+            results.append(self._check_uuid(uuid, row))
+            results.append(self._check_not_market(uuid, row))
 
         # Validate char limits
         results.append(self.validate_char_limit("Beschreibung", beschreibung))
@@ -2,13 +2,21 @@
 """Build SQLite database and FAISS embedding index from ecoinvent CSV.
 
 Run from the backend directory:
-    python -m scripts.build_index
+    python -m scripts.build_index [--fast-csv] [--force]
+
+Each step records a digest of the CSV (and the index settings) in a manifest
+next to the database and is skipped on later runs while they are unchanged.
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
 import logging
 import sys
 import os
+import threading
+from pathlib import Path
 
 # Add backend dir to path so we can import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,28 +32,86 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _file_digest(path: Path) -> str:
+    """blake2b hex digest of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_manifest(path: Path, manifest: dict):
+    path.write_text(json.dumps(manifest, indent=2))
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--fast-csv",
+        action="store_true",
+        help="Parse the CSV with pyarrow (pip install '.[arrow]')",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild the database and index even if the manifest is up to date",
+    )
+    args = parser.parse_args()
+
+    manifest_path = settings.db_path.with_suffix(".manifest.json")
+    manifest = _read_manifest(manifest_path)
+    csv_digest = _file_digest(settings.csv_path)
+
+    emb_index = EmbeddingIndex(
+        model_name=settings.embedding_model,
+        index_type=settings.faiss_index_type,
+        factory=settings.faiss_factory,
+        quantization=settings.faiss_quantization,
+        onnx_path=settings.embedding_onnx_path,
+        device=settings.embedding_device,
+        fp16=settings.embedding_fp16,
+        processes=settings.embedding_processes,
+    )
+    # Load the embedding model (download, device init) while the CSV loads
+    warm_up = threading.Thread(
+        target=emb_index.warm_up, name="model-warm-up", daemon=True
+    )
+    warm_up.start()
+
     # Step 1: Load CSV into SQLite
     logger.info("=== Step 1: Building SQLite database ===")
     store = DatasetStore(settings.db_path)
-    store.initialize_from_csv(settings.csv_path)
+    if args.force or manifest.get("database") != csv_digest:
+        # Loaded from another CSV version (or unknown): reload from scratch
+        store.drop_datasets()
+    else:
+        logger.info("  CSV unchanged since the last build")
+    store.initialize_from_csv(settings.csv_path, fast_csv=args.fast_csv)
+    manifest["database"] = csv_digest
+    _write_manifest(manifest_path, manifest)
 
     # Verify
-    total = store.connect().execute("SELECT COUNT(*) FROM datasets").fetchone()[0]
-    market = store.connect().execute(
-        "SELECT COUNT(*) FROM datasets WHERE is_market = 1"
-    ).fetchone()[0]
-    units = store.get_all_units()
+    total, market = store.get_row_counts()
+    units = store.get_sorted_units()
     logger.info(f"  Total rows: {total}")
     logger.info(f"  Market rows: {market}")
     logger.info(f"  Searchable rows: {total - market}")
-    logger.info(f"  Distinct units: {sorted(units)}")
+    logger.info(f"  Distinct units: {units}")
 
     # Quick FTS test
     fts_results = store.fts_search("webcam camera", limit=5)
     logger.info(f"  FTS test 'webcam camera': {len(fts_results)} results")
+    datasets = {ds.id: ds for ds in store.get_datasets_by_ids([rid for rid, _ in fts_results])}
     for rid, score in fts_results:
-        ds = store.get_dataset_by_id(rid)
+        ds = datasets.get(rid)
         if ds:
             logger.info(f"    [{score:.2f}] {ds.activity_name} | {ds.product_name} | {ds.geography}")
 
@@ -54,15 +120,33 @@ def main():
     texts_with_ids = store.get_non_market_search_texts()
     logger.info(f"  Non-market texts to encode: {len(texts_with_ids)}")
 
-    emb_index = EmbeddingIndex(model_name=settings.embedding_model)
-    emb_index.build_index(texts_with_ids)
-    emb_index.save(settings.faiss_index_path, settings.faiss_metadata_path)
+    index_key = {
+        "csv": csv_digest,
+        "embedding_model": settings.embedding_model,
+        "faiss_index_type": settings.faiss_index_type,
+        "faiss_factory": settings.faiss_factory,
+        "faiss_quantization": settings.faiss_quantization,
+    }
+    warm_up.join()
+    if (
+        not args.force
+        and manifest.get("index") == index_key
+        and settings.faiss_index_path.exists()
+    ):
+        logger.info("  Index is up to date, skipping the build")
+        emb_index.load(settings.faiss_index_path, settings.faiss_metadata_path)
+    else:
+        emb_index.build_index(texts_with_ids, batch_size=settings.embedding_batch_size)
+        emb_index.save(settings.faiss_index_path, settings.faiss_embeddings_path)
+        manifest["index"] = index_key
+        _write_manifest(manifest_path, manifest)
 
     # Quick embedding test
     results = emb_index.search("webcam digital camera plastic", top_k=5)
     logger.info(f"  Embedding test 'webcam digital camera plastic': {len(results)} results")
+    datasets = {ds.id: ds for ds in store.get_datasets_by_ids([rid for rid, _ in results])}
     for rid, score in results:
-        ds = store.get_dataset_by_id(rid)
+        ds = datasets.get(rid)
         if ds:
             logger.info(f"    [{score:.4f}] {ds.activity_name} | {ds.product_name} | {ds.geography}")
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Export the embedding model to ONNX for faster encoding.
+
+EmbeddingIndex uses the exported model instead of PyTorch whenever
+settings.embedding_onnx_path exists. Requires the `onnx` extra:
+    pip install -e ".[onnx]"
+
+Run from the backend directory:
+    python -m scripts.export_onnx [--quantize]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import os
+
+# Add backend dir to path so we can import app modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Also write a dynamic INT8 model (AVX512-VNNI) next to the FP32 one",
+    )
+    args = parser.parse_args()
+
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    out_dir = settings.embedding_onnx_path
+    logger.info(f"Exporting {settings.embedding_model} to {out_dir}...")
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        settings.embedding_model, export=True
+    )
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(settings.embedding_model).save_pretrained(out_dir)
+
+    if args.quantize:
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        logger.info("Quantizing to INT8...")
+        quantizer = ORTQuantizer.from_pretrained(out_dir)
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+
+    logger.info("=== Done! ===")
+
+
+if __name__ == "__main__":
+    main()
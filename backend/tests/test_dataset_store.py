@@ -0,0 +1,114 @@
+"""Tests for the DatasetStore CSV loaders and FTS search."""
+import shutil
+
+import pytest
+
+from app.services import dataset_store
+from app.services.dataset_store import DatasetStore
+
+_HEADER = (
+    "Activity UUID_Product UUID;Activity Name;Geography;Reference Product Name;"
+    "Reference Product Unit;Reference Product Amount;Biogenic [kg CO2-Eq];"
+    "Total (excl. Biogenic) [kg CO2-Eq];Extra"
+)
+_ROWS = [
+    "uuid-0;market for cement, Portland;CH;cement, Portland;kg;1;0,702903;0,9178114;",
+    "uuid-1;cement production, Portland;RoW;cement, Portland;kg;1;0,0011;0,8314467;",
+    'uuid-2;Webcam production;;webcam;unit;1;1,5;12,25;"a;b"',
+    "uuid-3;electricity production, hydro;DE;Strom Öko;kWh;1;0;0,0042;",
+    "uuid-4;  Steel production, converter ;GLO;steel, low-alloyed;kg;1;0,1;1,9;",
+]
+
+_COLUMNS = (
+    "uuid, activity_name, activity_name_lower, geography, product_name, "
+    "product_name_lower, unit, amount, biogenic_kg, total_excl_bio_kg, "
+    "is_market, search_text"
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "ecoinvent.csv"
+    # utf-8-sig: the ecoinvent export starts with a BOM
+    path.write_text("\n".join([_HEADER, *_ROWS]) + "\n", encoding="utf-8-sig")
+    return path
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    stores = []
+
+    def make(name: str) -> DatasetStore:
+        store = DatasetStore(tmp_path / f"{name}.db")
+        stores.append(store)
+        return store
+
+    yield make
+    # DatasetStore connections are thread-local, so only the last one is open
+    for store in stores:
+        store.close()
+
+
+def _load(store: DatasetStore, csv_path, fast_csv: bool = False) -> list[tuple]:
+    store.initialize_from_csv(csv_path, fast_csv=fast_csv)
+    rows = store.connect().execute(
+        f"SELECT {_COLUMNS} FROM datasets ORDER BY id"
+    ).fetchall()
+    store.close()
+    return [tuple(r) for r in rows]
+
+
+def _load_python(store, csv_path, monkeypatch) -> list[tuple]:
+    with monkeypatch.context() as m:
+        m.setattr(dataset_store.shutil, "which", lambda name: None)
+        return _load(store, csv_path)
+
+
+def test_python_loader_rows(make_store, csv_path, monkeypatch):
+    rows = _load_python(make_store("py"), csv_path, monkeypatch)
+
+    assert len(rows) == len(_ROWS)
+    assert rows[0][:4] == (
+        "uuid-0", "market for cement, Portland", "market for cement, portland", "CH"
+    )
+    assert rows[0][8:11] == (0.702903, 0.9178114, 1)
+    assert rows[2][3] == ""  # missing Geography stays empty
+    assert rows[3][4] == "Strom Öko"
+    assert rows[4][2] == "steel production, converter"
+    assert rows[4][11] == "steel production, converter steel, low-alloyed"
+
+
+@pytest.mark.skipif(shutil.which("sqlite3") is None, reason="sqlite3 CLI not installed")
+def test_cli_loader_matches_python_loader(make_store, csv_path, monkeypatch):
+    expected = _load_python(make_store("py"), csv_path, monkeypatch)
+    assert _load(make_store("cli"), csv_path) == expected
+
+
+def test_arrow_loader_matches_python_loader(make_store, csv_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    expected = _load_python(make_store("py"), csv_path, monkeypatch)
+    assert _load(make_store("arrow"), csv_path, fast_csv=True) == expected
+
+
+def test_fts_two_terms_keep_or_recall(make_store, csv_path, monkeypatch):
+    store = make_store("fts")
+    _load_python(store, csv_path, monkeypatch)
+
+    # "cement" and "webcam" never occur in the same row; NEAR() alone would
+    # return nothing
+    hits = store.fts_search("cement webcam")
+    store.close()
+
+    assert {row_id for row_id, _ in hits} == {1, 2, 3}
+
+
+def test_fts_exclude_market_and_unknown_terms(make_store, csv_path, monkeypatch):
+    store = make_store("fts")
+    _load_python(store, csv_path, monkeypatch)
+
+    hits = store.fts_search("cement nonexistentterm", exclude_market=True)
+    missing = store.fts_search("nonexistentterm")
+    store.close()
+
+    assert [row_id for row_id, _ in hits] == [2]
+    assert missing == []
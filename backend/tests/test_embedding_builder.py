@@ -0,0 +1,106 @@
+"""Tests for building, saving and reloading the FAISS embedding index."""
+import pickle
+
+import faiss
+import numpy as np
+import pytest
+
+from app.services.embedding_builder import FLAT_QUANTIZATIONS, EmbeddingIndex
+
+_VOCABULARY = ["cement", "steel", "glass", "electricity", "hydro", "transport", "lorry", "wood"]
+
+_TEXTS = [
+    (11, "cement production"),
+    (23, "steel production"),
+    (35, "glass production"),
+    (47, "electricity hydro"),
+    (59, "transport lorry"),
+    (71, "wood"),
+]
+
+
+class _BagOfWordsEncoder:
+    """Stand-in for SentenceTransformer: one dimension per vocabulary word."""
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        vectors = np.zeros((len(texts), len(_VOCABULARY)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                if word in _VOCABULARY:
+                    vectors[row, _VOCABULARY.index(word)] += 1.0
+        if normalize_embeddings:
+            faiss.normalize_L2(vectors)
+        return vectors
+
+
+def _index(quantization: str = "fp16") -> EmbeddingIndex:
+    index = EmbeddingIndex(model_name="bag-of-words", quantization=quantization)
+    index._model = _BagOfWordsEncoder()
+    return index
+
+
+@pytest.mark.parametrize("quantization", FLAT_QUANTIZATIONS)
+def test_save_mmap_load_search_round_trip(tmp_path, quantization):
+    built = _index(quantization)
+    built.build_index(_TEXTS)
+    index_path = tmp_path / "faiss.index"
+    embeddings_path = tmp_path / "embeddings.npy"
+    built.save(index_path, embeddings_path)
+    expected = built.search_batch(["steel", "electricity hydro", "lorry"], top_k=3)
+
+    loaded = _index(quantization)
+    loaded.load(index_path, mmap=True)
+    results = loaded.search_batch(["steel", "electricity hydro", "lorry"], top_k=3)
+
+    # Dataset row ids come back from the index itself
+    assert [r[0][0] for r in results] == [23, 47, 59]
+    assert [[row_id for row_id, _ in r] for r in results] == [
+        [row_id for row_id, _ in r] for r in expected
+    ]
+    assert results[0][0][1] == pytest.approx(1.0, abs=0.02)
+
+    embeddings = EmbeddingIndex.load_embeddings(embeddings_path)
+    assert embeddings.dtype == np.float16
+    assert embeddings.shape == (len(_TEXTS), len(_VOCABULARY))
+
+
+def test_search_drops_padding_when_top_k_exceeds_index(tmp_path):
+    built = _index()
+    built.build_index(_TEXTS[:2])
+
+    results = built.search("cement", top_k=5)
+
+    assert [row_id for row_id, _ in results] == [11, 23]
+
+
+@pytest.mark.parametrize("id_map_format", ["pickle", "npy"])
+def test_load_legacy_index_with_id_map(tmp_path, id_map_format):
+    row_ids = [row_id for row_id, _ in _TEXTS]
+    vectors = _BagOfWordsEncoder().encode(
+        [text for _, text in _TEXTS], normalize_embeddings=True
+    )
+    legacy = faiss.IndexFlatIP(vectors.shape[1])
+    legacy.add(vectors)
+    index_path = tmp_path / "faiss.index"
+    faiss.write_index(legacy, str(index_path))
+
+    metadata_path = tmp_path / "faiss_metadata.pkl"
+    with open(metadata_path, "wb") as f:
+        if id_map_format == "pickle":
+            pickle.dump(row_ids, f)
+        else:
+            np.save(f, np.asarray(row_ids, dtype=np.int64))
+
+    loaded = _index()
+    loaded.load(index_path, metadata_path, mmap=True)
+
+    assert loaded.search("glass", top_k=1)[0][0] == 35
+    assert [row_id for row_id, _ in loaded.search("wood", top_k=10)][0] == 71
+
+
+def test_load_legacy_index_without_id_map(tmp_path):
+    index_path = tmp_path / "faiss.index"
+    faiss.write_index(faiss.IndexFlatIP(len(_VOCABULARY)), str(index_path))
+
+    with pytest.raises(FileNotFoundError):
+        _index().load(index_path, tmp_path / "missing.pkl")
@@ -0,0 +1,135 @@
+"""Tests for the SQLite-backed LLM response and unit-conversion caches."""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.services.llm_cache import LLMResponseCache, UnitConversionCache, make_cache_key
+
+
+def _age_rows(db_path, table: str, seconds: int):
+    """Backdate every row of a cache table."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        f"UPDATE {table} SET created_at = datetime(created_at, ?)",
+        (f"-{seconds} seconds",),
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "llm_cache.db"
+
+
+def test_make_cache_key_ignores_argument_order():
+    assert make_cache_key(model="m", messages=[1]) == make_cache_key(messages=[1], model="m")
+    assert make_cache_key(model="m") != make_cache_key(model="n")
+
+
+def test_response_cache_hit_and_miss(db_path):
+    cache = LLMResponseCache(db_path)
+    cache.put("k", '{"name": "select_match"}')
+    cache.put_result("k", {"type": "match"})
+
+    assert cache.get("k") == '{"name": "select_match"}'
+    assert cache.get_result("k") == {"type": "match"}
+    assert cache.get("other") is None
+    assert cache.get_result("other") is None
+    cache.close()
+
+
+def test_response_cache_ttl_expiry(db_path):
+    cache = LLMResponseCache(db_path, ttl_seconds=60)
+    cache.put("k", "response")
+    cache.put_result("k", [1, 2])
+    assert cache.get("k") == "response"
+
+    _age_rows(db_path, "llm_responses", 120)
+    _age_rows(db_path, "llm_results", 120)
+
+    assert cache.get("k") is None
+    assert cache.get_result("k") is None
+    cache.close()
+
+    # Without a TTL the same entries are still served
+    cache = LLMResponseCache(db_path)
+    assert cache.get("k") == "response"
+    cache.close()
+
+
+def test_response_cache_discard_drops_both_tables(db_path):
+    cache = LLMResponseCache(db_path)
+    cache.put("k", "response")
+    cache.put_result("k", {"a": 1})
+
+    cache.discard("k")
+
+    assert cache.get("k") is None
+    assert cache.get_result("k") is None
+    cache.close()
+
+
+def _unit_vector(*values: float) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_unit_cache_similarity_hit_and_miss(db_path):
+    cache = UnitConversionCache(db_path, similarity_threshold=0.95)
+    conversion = {"conversion_factor": 0.001, "explanation": "1 kg = 0.001 t"}
+    cache.add("kg", "t", "model", "steel", _unit_vector(1, 0, 0), conversion)
+
+    assert cache.lookup("kg", "t", "model", _unit_vector(1, 0.1, 0)) == conversion
+    assert cache.lookup("kg", "t", "model", _unit_vector(0, 1, 0)) is None
+    assert cache.lookup("kg", "t", "other-model", _unit_vector(1, 0, 0)) is None
+    cache.close()
+
+    # A fresh instance loads the bucket from disk
+    cache = UnitConversionCache(db_path)
+    assert cache.lookup("kg", "t", "model", _unit_vector(1, 0, 0)) == conversion
+    cache.close()
+
+
+def test_unit_cache_ttl_expiry(db_path):
+    cache = UnitConversionCache(db_path, ttl_seconds=60)
+    conversion = {"conversion_factor": 3.6, "explanation": "1 kWh = 3.6 MJ"}
+    cache.add("kWh", "MJ", "model", "power", _unit_vector(0, 0, 1), conversion)
+    assert cache.lookup("kWh", "MJ", "model", _unit_vector(0, 0, 1)) == conversion
+    cache.close()
+
+    _age_rows(db_path, "unit_conversions", 120)
+
+    cache = UnitConversionCache(db_path, ttl_seconds=60)
+    assert cache.lookup("kWh", "MJ", "model", _unit_vector(0, 0, 1)) is None
+    cache.close()
+
+
+def test_unit_cache_migrates_rows_without_created_at(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """CREATE TABLE unit_conversions (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               reference_unit TEXT NOT NULL, dataset_unit TEXT NOT NULL,
+               embedding_model TEXT NOT NULL, product_context TEXT NOT NULL,
+               embedding BLOB NOT NULL, conversion_factor REAL NOT NULL,
+               explanation TEXT NOT NULL)"""
+    )
+    conn.execute(
+        """INSERT INTO unit_conversions (reference_unit, dataset_unit, embedding_model,
+               product_context, embedding, conversion_factor, explanation)
+           VALUES ('kg', 't', 'model', 'steel', ?, 0.001, 'legacy')""",
+        (_unit_vector(1, 0, 0).tobytes(),),
+    )
+    conn.commit()
+    conn.close()
+
+    cache = UnitConversionCache(db_path)
+    assert cache.lookup("kg", "t", "model", _unit_vector(1, 0, 0))["explanation"] == "legacy"
+    cache.close()
+
+    # Pre-TTL rows count as stale once a TTL is set
+    cache = UnitConversionCache(db_path, ttl_seconds=3600)
+    assert cache.lookup("kg", "t", "model", _unit_vector(1, 0, 0)) is None
+    cache.close()
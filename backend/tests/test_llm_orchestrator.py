@@ -0,0 +1,210 @@
+"""Tests for parsing and re-asking Claude's decision tool calls."""
+import asyncio
+
+import pytest
+
+from app.models import CandidateResult, DatasetRow, DecisionType
+from app.services import llm_orchestrator
+from app.services.llm_orchestrator import LLMOrchestrator
+
+
+def _candidate(uuid: str, activity_name: str) -> CandidateResult:
+    return CandidateResult(
+        dataset=DatasetRow(
+            id=1,
+            uuid=uuid,
+            activity_name=activity_name,
+            activity_name_lower=activity_name.lower(),
+            geography="GLO",
+            product_name="cement",
+            unit="kg",
+            amount=1,
+            biogenic_kg=0.0,
+            total_excl_bio_kg=0.9,
+            is_market=False,
+        )
+    )
+
+
+@pytest.fixture
+def llm():
+    orchestrator = LLMOrchestrator(api_key="test-key")
+    yield orchestrator
+    orchestrator.close()
+
+
+@pytest.fixture
+def candidates():
+    return [
+        _candidate("uuid-a", "cement production, Portland"),
+        _candidate("uuid-b", "cement production, alternative constituents"),
+    ]
+
+
+def test_parse_match(llm, candidates):
+    decision = llm._parse_response(
+        {"name": "select_match", "input": {"UUID": "uuid-b"}}, candidates
+    )
+    assert decision.type == DecisionType.MATCH
+    assert decision.selected_uuid == "uuid-b"
+
+
+def test_parse_ambiguous_fills_candidate_details(llm, candidates):
+    decision = llm._parse_response(
+        {
+            "name": "report_ambiguous",
+            "input": {
+                "options": [
+                    {"UUID": "uuid-b", "why_short": "blended"},
+                    {"UUID": "uuid-unknown"},
+                    {"UUID": "uuid-a"},
+                ]
+            },
+        },
+        candidates,
+    )
+    assert decision.type == DecisionType.AMBIGUOUS
+    # Options outside the candidate list are skipped; ranks follow the input
+    assert [(c.uuid, c.rank) for c in decision.candidates] == [("uuid-b", 1), ("uuid-a", 3)]
+    assert decision.candidates[0].activity_name == "cement production, alternative constituents"
+    assert decision.candidates[1].why_short == ""
+
+
+def test_parse_decompose(llm):
+    decision = llm._parse_response(
+        {
+            "name": "decompose",
+            "input": {
+                "components": [
+                    {
+                        "component_label": "steel frame",
+                        "assumed_quantity": "0.7",
+                        "assumed_unit": "kg",
+                        "search_query_text": "steel, low-alloyed",
+                    },
+                    {
+                        "component_label": "glass pane",
+                        "assumed_quantity": 0.3,
+                        "assumed_unit": "kg",
+                        "search_query_text": "flat glass",
+                    },
+                ]
+            },
+        },
+        candidates=[],
+    )
+    assert decision.type == DecisionType.DECOMPOSE
+    assert [c.assumed_quantity for c in decision.components] == [0.7, 0.3]
+    assert decision.assumptions == []
+
+
+@pytest.mark.parametrize(
+    "tool_call",
+    [
+        # Unknown tool
+        {"name": "convert_unit", "input": {"conversion_factor": 1, "explanation": ""}},
+        # UUID missing
+        {"name": "select_match", "input": {}},
+        # UUID of the wrong type
+        {"name": "select_match", "input": {"UUID": 42}},
+        # UUID not among the candidates
+        {"name": "select_match", "input": {"UUID": "uuid-unknown"}},
+        # Component without a search query
+        {
+            "name": "decompose",
+            "input": {
+                "components": [
+                    {"component_label": "x", "assumed_quantity": 1, "assumed_unit": "kg"}
+                ]
+            },
+        },
+    ],
+)
+def test_parse_invalid_tool_call(llm, candidates, tool_call):
+    with pytest.raises(ValueError):
+        llm._parse_response(tool_call, candidates)
+
+
+class _ScriptedCalls:
+    """Replaces _cached_create/_acached_create with canned tool calls."""
+
+    def __init__(self, *tool_calls: dict):
+        self.tool_calls = list(tool_calls)
+        self.requests: list[dict] = []
+
+    def __call__(self, prompt_hash: str, **request) -> dict:
+        self.requests.append(request)
+        return self.tool_calls.pop(0)
+
+    async def acall(self, prompt_hash: str, **request) -> dict:
+        return self(prompt_hash, **request)
+
+
+_UNKNOWN_UUID_CALL = {"id": "toolu_1", "name": "select_match", "input": {"UUID": "uuid-x"}}
+_VALID_CALL = {"id": "toolu_2", "name": "select_match", "input": {"UUID": "uuid-a"}}
+
+
+def test_decide_reasks_after_unknown_uuid(llm, candidates):
+    calls = _ScriptedCalls(_UNKNOWN_UUID_CALL, _VALID_CALL)
+    llm._cached_create = calls
+
+    decision = llm.decide({"bezeichnung": "cement"}, candidates)
+
+    assert decision.selected_uuid == "uuid-a"
+    first, second = calls.requests
+    assert second["messages"][:1] == first["messages"]
+    assert second["messages"][1]["content"][0]["id"] == "toolu_1"
+    tool_result = second["messages"][2]["content"][0]
+    assert tool_result["tool_use_id"] == "toolu_1"
+    assert tool_result["is_error"] is True
+    assert "uuid-x" in tool_result["content"]
+
+
+def test_adecide_raises_runtime_error_when_retries_run_out(llm, candidates):
+    calls = _ScriptedCalls(_UNKNOWN_UUID_CALL, _UNKNOWN_UUID_CALL)
+    llm._acached_create = calls.acall
+
+    with pytest.raises(RuntimeError, match="after 2 attempts"):
+        asyncio.run(llm.adecide({"bezeichnung": "cement"}, candidates))
+
+    assert len(calls.requests) == 2
+
+
+def _conversion_call(factor: float) -> dict:
+    return {
+        "id": "toolu_conv",
+        "name": "convert_unit",
+        "input": {"conversion_factor": factor, "explanation": f"factor {factor}"},
+    }
+
+
+def test_convert_unit_memo_expires_with_cache_ttl(monkeypatch):
+    now = [60.0 * 20_000]  # start of a TTL period
+    monkeypatch.setattr(llm_orchestrator.time, "time", lambda: now[0])
+    llm = LLMOrchestrator(api_key="test-key", cache_ttl_seconds=60)
+    calls = _ScriptedCalls(_conversion_call(36.0), _conversion_call(35.8))
+    llm._cached_create = calls
+
+    assert llm.convert_unit("l", "MJ", "diesel")["conversion_factor"] == 36.0
+    now[0] += 30
+    assert llm.convert_unit("l", "MJ", "diesel")["conversion_factor"] == 36.0
+    assert len(calls.requests) == 1
+
+    now[0] += 60
+    assert llm.convert_unit("l", "MJ", "diesel")["conversion_factor"] == 35.8
+    assert len(calls.requests) == 2
+    llm.close()
+
+
+def test_convert_unit_memo_without_ttl_never_expires(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_orchestrator.time, "time", lambda: now[0])
+    llm = LLMOrchestrator(api_key="test-key")
+    calls = _ScriptedCalls(_conversion_call(36.0))
+    llm._cached_create = calls
+
+    llm.convert_unit("l", "MJ", "diesel")
+    now[0] += 10 ** 9
+    assert llm.convert_unit("l", "MJ", "diesel")["conversion_factor"] == 36.0
+    assert len(calls.requests) == 1
+    llm.close()
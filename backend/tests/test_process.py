@@ -0,0 +1,127 @@
+"""Tests for the background job runner in the process router."""
+import asyncio
+
+import pytest
+
+from app.models import (
+    CandidateResult,
+    DatasetRow,
+    DecisionType,
+    DecompComponent,
+    LLMDecision,
+    RetrievalResult,
+)
+from app.routers import process
+from app.services.llm_orchestrator import LLMOrchestrator
+
+
+class _Store:
+    """Minimal DatasetStore stand-in holding one job's input rows."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.statuses: list[str] = []
+
+    def get_input_rows(self, job_id: str) -> list[dict]:
+        return self.rows
+
+    def update_job_status(self, job_id: str, status: str, done_rows=None):
+        self.statuses.append(status)
+
+
+@pytest.fixture
+def orchestrators(monkeypatch):
+    """Record the LLMOrchestrator each job creates (without a cache)."""
+    created: list[LLMOrchestrator] = []
+
+    def make(**kwargs):
+        llm = LLMOrchestrator(api_key="test-key")
+        created.append(llm)
+        return llm
+
+    monkeypatch.setattr(process, "LLMOrchestrator", make)
+    return created
+
+
+@pytest.mark.parametrize("batch_api", [False, True])
+def test_job_closes_orchestrator_when_a_row_fails(monkeypatch, orchestrators, batch_api):
+    async def failing_row(row, *args):
+        raise RuntimeError("boom")
+
+    def failing_batch(*args):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(process.settings, "llm_batch_api", batch_api)
+    monkeypatch.setattr(process, "aprocess_row", failing_row)
+    monkeypatch.setattr(process, "_process_rows_batched", failing_batch)
+    store = _Store([{"id": 1, "status": "pending"}])
+
+    with pytest.raises(RuntimeError, match="boom"):
+        process._process_all_rows("job", "auto", store, None, None)
+
+    [llm] = orchestrators
+    assert llm.client.is_closed()
+    assert llm.async_client.is_closed()
+
+
+def _component(label: str) -> DecompComponent:
+    return DecompComponent(
+        component_label=label,
+        assumed_quantity=0.5,
+        assumed_unit="kg",
+        search_query_text=label,
+    )
+
+
+class _Retriever:
+    """Finds one candidate for every component except "missing"."""
+
+    def retrieve(self, bezeichnung, **kwargs) -> RetrievalResult:
+        if bezeichnung == "missing":
+            return RetrievalResult(force_decompose=True)
+        dataset = DatasetRow(
+            id=1, uuid=f"uuid-{bezeichnung}", activity_name=bezeichnung,
+            activity_name_lower=bezeichnung, geography="GLO", product_name=bezeichnung,
+            unit="kg", amount=1, biogenic_kg=0.0, total_excl_bio_kg=1.0, is_market=False,
+        )
+        return RetrievalResult(candidates=[CandidateResult(dataset=dataset)])
+
+
+class _SlowLLM:
+    """Selection calls that only finish when they are not cancelled."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+        self.finished: list[str] = []
+
+    async def adecide(self, input_row, candidates, allow_decompose=True):
+        label = input_row["bezeichnung"]
+        self.started.append(label)
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled.append(label)
+            raise
+        self.finished.append(label)
+        return LLMDecision(type=DecisionType.MATCH, selected_uuid=candidates[0].dataset.uuid)
+
+
+def test_component_failure_cancels_sibling_components():
+    llm = _SlowLLM()
+    decision = LLMDecision(
+        type=DecisionType.DECOMPOSE,
+        components=[_component("steel"), _component("missing"), _component("glass")],
+    )
+
+    async def run():
+        with pytest.raises(process._ComponentError, match="missing"):
+            await process._aresolve_components(
+                {"region_norm": "GLO"}, decision, _Retriever(), llm, None
+            )
+        # No sibling is left running once the row has failed
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(run()) == set()
+    assert llm.finished == []
+    assert sorted(llm.cancelled) == sorted(llm.started)